@@ -1,8 +1,27 @@
 import streamlit as st
-import pandas as pd
 import google.generativeai as genai
-import io
-import time
+import os
+
+from hcta import jobs
+from hcta.batching import DEFAULT_BATCH_SIZE
+from hcta.cache import count_cached_summaries
+from hcta.engine import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+)
+from hcta.pipeline import MODEL_NAME, RunSettings
+from hcta.resilience import DEFAULT_MAX_RETRIES, DEFAULT_REQUEST_TIMEOUT
+from hcta.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    OUTPUT_FORMATS,
+    SUPPORTED_INPUT_TYPES,
+    count_rows,
+    read_head,
+)
+from hcta.telemetry import format_duration, prometheus_text
+from hcta.template import sample_template_bytes
+from hcta.validate import DEFAULT_MAX_REGENERATIONS
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -11,178 +30,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- Savant Prompt Template (Final, Untrimmed Version) ---
-# This is the complete, untrimmed prompt with the full dictionary and all examples.
-SAVANT_PROMPT_TEMPLATE = """
-# Gemini, ACT as an expert-level talent assessment analyst and report writer. Your name is "AnalystAI".
-# Your task is to generate a concise, insightful, and professional leadership potential summary based on candidate data.
-# You must adhere to all rules, formats, and interpretation logic provided below without deviation.
-
-# --- ABSOLUTE RULES & WRITING STYLE ---
-# 1.  **Tone & Language:** Write in the third person, present tense only. Use professional, neutral language and American English spelling. Avoid judgmental, speculative, or robotic tones.
-# 2.  **Word Count:** The entire summary paragraph must be under 200 words.
-# 3.  **Anonymity:** Do not mention AI, tools, processes, or the names of the assessments.
-# 4.  **Behavioral Framing:** All bullet points must be one sentence each and framed in behavioral terms. Do not name competencies directly.
-# 5.  **No Ratings:** Do not mention numeric scores or use rating-like terms. Use only the provided behavioral interpretations from the dictionary.
-# 6.  **Constructive Language:** Avoid value-laden terms like "good," "bad," or "lacks." Instead, use phrases like "…may enhance impact by…", "…has an opportunity to develop…", or "…demonstrates moderate capability in…".
-# 7.  **Pronouns:** Use pronouns (he/she, his/her) that match the provided `Gender` input (M/F).
-
-# --- FORMAT & STRUCTURE (NON-NEGOTIABLE) ---
-# 1.  **One-Paragraph Summary:**
-#     - Start the paragraph *exactly* with the text from the "Overall Leadership" interpretation. For example: "John demonstrates moderate potential with a reasonable capacity for growth..."
-#     - Describe the candidate's likely workplace behaviors based on the provided score interpretations from the dictionary.
-#     - Synthesize patterns across all competencies, using the provided mapping for BS and TI. Focus on standout strengths and development areas.
-# 2.  **Bullet Points (Strengths & Development Areas):**
-#     - After the paragraph, provide exactly two strengths and two development areas.
-#     - Use the heading "Strengths:" and "Development Areas:".
-#     - These points must extend or complement the paragraph, not repeat it.
-
-# --- LOGIC & INTERPRETATION ENGINE ---
-# 1.  **Score Categorization:** High = 3.5-5.0; Moderate = 2.5-3.49; Low = 1.0-2.49.
-# 2.  **Strength/Development Rule:** Scores >= 4.0 are *only* strengths. Scores <= 2.0 are *only* development areas.
-# 3.  **BS & TI Mapping:**
-#     - Steers Changes <-> Change Potential
-#     - Manages Stakeholders <-> People Potential
-#     - Drives Results <-> Drive Potential
-#     - Thinks Strategically <-> Strategic Potential
-#     - Solves Challenges <-> Execution Potential
-#     - Develops Talent <-> Learning Potential
-
-# --- BEHAVIORAL DICTIONARY (USE THIS TEXT EXACTLY) ---
-# **Core Competencies:**
-# Overall Leadership:
-#   - High: Demonstrates high potential with a strong capacity for growth and success in a more complex role.
-#   - Moderate: Demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role.
-#   - Low: Demonstrates low potential with a reasonable capacity for growth and success in a more complex role.
-# Reasoning & Problem Solving:
-#   - High: Candidate demonstrates a higher-than-average reasoning and problem-solving ability as compared to a group of peers.
-#   - Moderate: Candidate demonstrates an average reasoning and problem-solving ability as compared to a group of peers.
-#   - Low: Candidate demonstrates a below-average reasoning and problem-solving ability as compared to a group of peers.
-# **Business Simulation (BS) Competencies:**
-# Steers Changes:
-#   - High: Strong ability to recognise and drive change and transformation at an organisational level. Displays strong resilience and strength during adversity and is well equipped to enable buy-in and support.
-#   - Moderate: Moderate ability to contribute to organisational change and transformation. Shows resilience during challenging times and can occasionally support others in gaining buy-in.
-#   - Low: Limited ability to support change and transformation at an organisational level. Struggles to remain resilient during adversity and has difficulty enabling buy-in and support.
-# Manages Stakeholders:
-#   - High: Strong ability to develop and nurture relationships with key stakeholders. Actively finds synergies between organisations to ensure positive outcomes. Networks with stakeholders within and outside one’s industry to stay up-to-date about new developments.
-#   - Moderate: Moderate ability to maintain and build relationships with key stakeholders. Occasionally identifies synergies between organisations and engages with stakeholders to stay informed of developments.
-#   - Low: Limited ability to develop and maintain relationships with stakeholders. Rarely identifies synergies between organisations or engages with external stakeholders to stay informed.
-# Drives Results:
-#   - High: Strong ability to articulate performance standards and metrics that support the achievement of organisational goals. Ensures a high-performance culture across teams and demonstrates grit in achievement of challenging goals.
-#   - Moderate: Moderate ability to articulate performance standards and metrics that contribute to achieving organisational goals. Occasionally supports performance across teams and shows persistence when working towards goals.
-#   - Low: Low ability to articulate performance standards and metrics that support organisational goals. Needs development in fostering a high-performance culture and in maintaining persistence when faced with challenging goals.
-# Thinks Strategically:
-#   - High: Strong ability to balance the achievement of short-term results with creating long-term value and competitive advantage. Successfully translates complex organisational goals into meaningful actions across teams.
-#   - Moderate: Moderate ability to balance short-term results with long-term priorities. Occasionally translates organisational goals into meaningful actions across teams.
-#   - Low: Low ability to balance short-term performance with long-term value creation. Struggles to translate organisational goals into meaningful team actions.
-# Solves Challenges:
-#   - High: Strong ability to deal with ambiguous and complex situations, by making tough decisions where necessary. Is comfortable leading in an environment where goals are frequently complex and thrives during periods of uncertainty.
-#   - Moderate: Moderate ability to handle some ambiguous and complex situations by making necessary decisions. Shows some confidence in leading through moderately uncertain environments.
-#   - Low: Low ability to deal with ambiguity and complexity. Hesitant to make tough decisions and limited confidence in leading through uncertain situations.
-# Develops Talent:
-#   - High: Strong ability to leverage and nurture individual strengths to achieve positive outcomes. Actively fosters a culture of learning and advocates for career advancement opportunities within the organisation.
-#   - Moderate: Moderate ability to recognise and utilise individual strengths to support positive outcomes. Supports learning and contributes to career development within the organisation.
-#   - Low: Low ability to identify and leverage individual strengths. Rarely supports learning or advocates for career development within the organisation.
-# **Thriving Index (TI) Potentials & Factors:**
-# Drive Potential:
-#   - High: Consistently demonstrates a positive mindset and motivation; regularly takes initiative to exceed expectations with a strong drive to achieve goals, targets, and results. Seeks fulfillment through impact.
-#   - Moderate: Shows a generally positive mindset and some motivation; occasionally takes initiative and shows a drive to achieve goals, but may need support. Interest in making an impact is present but not sustained.
-#   - Low: Demonstrates limited motivation or initiative; may meet expectations but does not show a consistent drive to exceed them. Fulfillment from work or desire to make an impact is not clearly evident.
-# Learning Potential:
-#   - High: Consistently takes time to focus on personal and professional growth - for both self and others. Actively pursues continuous improvement and excellence; shows clear willingness to learn and unlearn.
-#   - Moderate: Shows some effort toward personal and professional growth. Engages in learning activities but may not do so consistently. Some openness to learning and unlearning.
-#   - Low: Rarely focuses on personal or professional growth. Engagement in learning is limited and may resist feedback or change.
-# People Potential:
-#   - High: Consistently shows capability to lead and inspire others. Displays strong empathy, understanding, and a focus on people. Builds relationships with ease and enjoys social interactions.
-#   - Moderate: Displays some ability to relate to and lead others. May show empathy and focus on people inconsistently. Builds relationships but may need support.
-#   - Low: Shows limited capability in leading or inspiring others. Social interaction may be minimal or strained. Struggles to build and maintain relationships.
-# Strategic Potential:
-#   - High: Approaches work with a strong focus on the bigger picture. Operates independently with minimal guidance. Demonstrates a commercial and strategic mindset, regularly anticipating trends and their impact.
-#   - Moderate: Some awareness of the bigger picture but may need occasional guidance. Understands strategy in parts but may not consistently anticipate trends or broader implications.
-#   - Low: Focus tends to be on immediate tasks. Requires frequent guidance. Shows limited awareness of trends or the strategic impact of work.
-# Execution Potential:
-#   - High: Consistently addresses problems and challenges with confidence and resilience. Takes a diligent, practical, and solution-focused approach to solving issues.
-#   - Moderate: Can address problems but may need support or time to build confidence and resilience. Attempts a practical approach but not always solution-focused.
-#   - Low: Struggles to address problems confidently. May rely heavily on others. Practical or solution-oriented approaches are limited.
-# Change Potential:
-#   - High: Thrives in change and complexity. Manages new ways of working with adaptability, flexibility, and decisiveness during uncertainty.
-#   - Moderate: Generally copes with change and can adapt when needed. May need support to remain flexible or decisive in uncertain situations.
-#   - Low: Struggles with change or uncertainty. May resist new ways of working and has difficulty adapting or deciding in changing circumstances.
-
-# --- GOLD STANDARD EXAMPLES (LEARN FROM THESE) ---
-# **EXAMPLE 1:**
-# **INPUT:** Name: Sub 1, Gender: M, Overall Leadership: 4, Reasoning & Problem Solving: 4, Drive Potential: 4, Contribution: 5, Purpose: 4, Achievement: 2, Learning Potential: 3, Mastery: 3, Growth: 3, Insightful: 3, People Potential: 4, Collaboration: 4, Empathy: 4, Sociable: 5, Strategic Potential: 4, Awareness: 5, Autonomy: 3, Perspective: 4, Execution Potential: 5, Resourcefulness: 5, Efficacy: 5, Resilience: 5, Change Potential: 4, Agility: 5, Ambiguity: 5, Venturesome: 3, Steers Changes: 5, Manages Stakeholders: 4, Drives Results: 5, Thinks Strategically: 4, Solves Challenges: 5, Develops Talent: 3
-# **CORRECT OUTPUT:**
-# Sub1 demonstrates high leadership potential and the ability to operate effectively in increasingly complex roles. He is driven, resilient, and purpose-oriented, consistently exceeding expectations while maintaining a learning mindset. His ability to inspire others, collaborate across boundaries, and display emotional intelligence in team dynamics stands out. He shows high ownership of his development, with a solid grasp of goal alignment and delivery under pressure. While highly sociable and strategically aware, the candidate’s ability to handle ambiguity and data interpretation is still maturing. He is comfortable with change, taking initiative, and influencing outcomes proactively. Continued focus on building strategic insight and sharpening analytical depth will help him transition to higher-impact roles more seamlessly.
-#
-# Strengths:
-# • Demonstrates drive and resilience, consistently going beyond expectations while maintaining focus on outcomes.
-# • High sociability and collaboration; effectively leads and engages others across teams with strong interpersonal impact.
-#
-# Development Areas:
-# • May benefit from actively seeking learning opportunities and showing openness to new ways of thinking.
-# • Has an opportunity to strengthen leadership impact by investing more in supporting the development of others.
-
-# **EXAMPLE 2:**
-# **INPUT:** Name: John Doe, Gender: M, Overall Leadership: 3, Reasoning & Problem Solving: 3, Drive Potential: 2, Contribution: 2, Purpose: 2, Achievement: 1, Learning Potential: 2, Mastery: 1, Growth: 3, Insightful: 2, People Potential: 3, Collaboration: 3, Empathy: 3, Sociable: 4, Strategic Potential: 3, Awareness: 3, Autonomy: 3, Perspective: 3, Execution Potential: 3, Resourcefulness: 3, Efficacy: 3, Resilience: 3, Change Potential: 2, Agility: 3, Ambiguity: 3, Venturesome: 3, Steers Changes: 2, Manages Stakeholders: 3, Drives Results: 1, Thinks Strategically: 2, Solves Challenges: 3, Develops Talent: 1
-# **CORRECT OUTPUT:**
-# John demonstrates moderate leadership potential, with strengths in resilience and collaborative behaviors. He shows the ability to stay composed under pressure and contributes positively to team settings. His responses suggest a practical mindset and the ability to support group goals, especially in stable or familiar contexts. However, he may benefit from taking more initiative, particularly in unstructured or high-accountability situations. His approach to learning appears more reactive than proactive, and he may not consistently seek opportunities to expand his skillset. The ability to develop others also appears limited, indicating an opportunity to more actively support and grow talent around him. Enhancing learning agility and ownership could help him elevate his overall leadership impact.
-#
-# Strengths:
-# • Maintains a calm and solution-oriented approach under pressure, supporting consistent delivery.
-# • Builds constructive team relationships and collaborates effectively to meet shared goals.
-#
-# Development Areas:
-# • May benefit from proactively seeking learning opportunities to build broader adaptability and ownership, particularly in ambiguous situations.
-# • Limited strategic clarity and learning orientation restrict consistent performance elevation.
-
-# **EXAMPLE 3:**
-# **INPUT:** Name: Jane Doe, Gender: F, Overall Leadership: 2, Reasoning & Problem Solving: 1, Drive Potential: 3, Contribution: 2, Purpose: 3, Achievement: 4, Learning Potential: 4, Mastery: 4, Growth: 5, Insightful: 3, People Potential: 2, Collaboration: 3, Empathy: 2, Sociable: 1, Strategic Potential: 2, Awareness: 1, Autonomy: 2, Perspective: 3, Execution Potential: 2, Resourcefulness: 2, Efficacy: 1, Resilience: 2, Change Potential: 2, Agility: 1, Ambiguity: 1, Venturesome: 3, Steers Changes: 1, Manages Stakeholders: 1, Drives Results: 2, Thinks Strategically: 1, Solves Challenges: 2, Develops Talent: 4
-# **CORRECT OUTPUT:**
-# Jane demonstrates moderate leadership potential, with emerging strengths in resilience and team collaboration. She generally maintains a constructive mindset and engages well in group settings, particularly when expectations are clearly defined. Her responses suggest that she benefits from external structure and guidance, which can support her contribution in routine or familiar situations. However, she may be less confident when required to act independently, particularly in ambiguous or high-responsibility contexts. Strategic orientation and clarity of purpose also appear limited, which may affect her ability to take initiative or contribute meaningfully to longer-term goals. With targeted support to build autonomy and forward-thinking behaviors, Jane can continue strengthening her readiness for broader leadership responsibility.
-#
-# Strengths:
-# • Demonstrates a generally positive mindset and can collaborate effectively when provided with direction.
-# • Shows moderate resilience and willingness to recover from setbacks with some support.
-#
-# Development Areas:
-# • Needs to build independence and initiative; currently depends too much on guidance to perform consistently.
-# • Lacks clarity in purpose and strategic thinking, limiting the ability to contribute meaningfully to complex goals.
-
-# **EXAMPLE 4:**
-# **INPUT:** Name: Anvita Sirohi, Gender: F, Overall Leadership: 3, Reasoning & Problem Solving: 4, Drive Potential: 4, Contribution: 4, Purpose: 4, Achievement: 1, Learning Potential: 3, Mastery: 3, Growth: 3, Insightful: 3, People Potential: 5, Collaboration: 5, Empathy: 5, Sociable: 4, Strategic Potential: 4, Awareness: 4, Autonomy: 3, Perspective: 5, Execution Potential: 4, Resourcefulness: 4, Efficacy: 4, Resilience: 5, Change Potential: 4, Agility: 4, Ambiguity: 5, Venturesome: 3, Steers Changes: 3, Manages Stakeholders: 2, Drives Results: 2, Thinks Strategically: 2, Solves Challenges: 3, Develops Talent: 4
-# **CORRECT OUTPUT:**
-# Anvita Sirohi demonstrates moderate leadership potential, with strengths in resilience, goal orientation, and consistent personal drive. She tends to stay focused on priorities and shows determination in following through on tasks, even in the face of setbacks. Her ability to maintain confidence and emotional stability supports steady execution and a results-oriented mindset. She demonstrates a generally independent working style, occasionally drawing on external input when needed. While her capacity to adapt to change is evident, she may benefit from developing more comfort with navigating uncertainty or shifting priorities. There is also room to broaden her strategic awareness and deepen stakeholder engagement to enhance her broader leadership impact.
-#
-# Strengths:
-# • Remains goal-focused and shows commitment to follow-through, even under pressure or after setbacks.
-# • Demonstrates resilience and belief in personal capability, contributing to consistent effort and delivery.
-#
-# Development Areas:
-# • May enhance leadership effectiveness by increasing comfort in navigating situations with ambiguity or incomplete information.
-# • Has an opportunity to strengthen strategic engagement by deepening awareness of stakeholder needs and the broader impact of decisions.
-
-# **EXAMPLE 5:**
-# **INPUT:** Name: Sub 5, Gender: M, Overall Leadership: 4, Reasoning & Problem Solving: 3, Drive Potential: 3, Contribution: 2, Purpose: 3, Achievement: 3, Learning Potential: 4, Mastery: 5, Growth: 5, Insightful: 3, People Potential: 4, Collaboration: 3, Empathy: 2, Sociable: 4, Strategic Potential: 3, Awareness: 2, Autonomy: 3, Perspective: 2, Execution Potential: 4, Resourcefulness: 4, Efficacy: 4, Resilience: 3, Change Potential: 3, Agility: 3, Ambiguity: 2, Venturesome: 3, Steers Changes: 2, Manages Stakeholders: 3, Drives Results: 2, Thinks Strategically: 2, Solves Challenges: 3, Develops Talent: 2
-# **CORRECT OUTPUT:**
-# Sub5 demonstrates moderate leadership potential, supported by strengths in sociability, collaboration, and emotional resilience. He tends to work well with others, building positive relationships and contributing to group cohesion. His approachable style and willingness to support team efforts allow them to navigate interpersonal dynamics effectively. In challenging situations, he tends to recover quickly and maintain a stable, steady presence. While generally confident and socially comfortable, there is less evidence of proactive goal orientation or strategic follow-through. Subject’s leadership potential may be enhanced by developing greater clarity and discipline in pursuing outcomes, as well as building confidence in decision-making when facing ambiguous or uncertain conditions.
-#
-# Strengths:
-# • Builds rapport with others and helps maintain team cohesion by constructively addressing interpersonal challenges.
-# • Demonstrates emotional steadiness and resilience, maintaining performance in the face of setbacks.
-#
-# Development Areas:
-# • May enhance impact by sharpening focus on results and taking greater initiative toward defined outcomes.
-# • Has an opportunity to build comfort in making decisions amid uncertainty or when information is incomplete.
-
-# --- END OF INSTRUCTIONS AND EXAMPLES ---
-
-### NEW CANDIDATE DATA TO ANALYZE ###
-{candidate_data_string}
-
-# AnalystAI, generate the report now.
-"""
-
 # --- App Title and Description ---
 st.title("HCTA AI Leadership Potential Report Generator")
 st.markdown("""
@@ -195,38 +42,7 @@ This application uses the Gemini family of models to generate executive summarie
 # --- Helper function to create and download the sample Excel file ---
 @st.cache_data
 def create_sample_template():
-    # Define all expected columns in the new, specific order
-    columns = [
-        'Name', 'Gender', 'Overall Leadership', 'Reasoning & Problem Solving',
-        'Drive Potential', 'Contribution', 'Purpose', 'Achievement',
-        'Learning Potential', 'Mastery', 'Growth', 'Insightful',
-        'People Potential', 'Collaboration', 'Empathy', 'Sociable',
-        'Strategic Potential', 'Awareness', 'Autonomy', 'Perspective',
-        'Execution Potential', 'Resourcefulness', 'Efficacy', 'Resilience',
-        'Change Potential', 'Agility', 'Ambiguity', 'Venturesome',
-        'Steers Changes', 'Manages Stakeholders', 'Drives Results',
-        'Thinks Strategically', 'Solves Challenges', 'Develops Talent'
-    ]
-    # Create a sample row
-    sample_data = {
-        'Name': ['Jane Doe'], 'Gender': ['F'], 'Overall Leadership': [2.0], 'Reasoning & Problem Solving': [1.0],
-        'Drive Potential': [3.0], 'Contribution': [2.0], 'Purpose': [3.0], 'Achievement': [4.0],
-        'Learning Potential': [4.0], 'Mastery': [4.0], 'Growth': [5.0], 'Insightful': [3.0],
-        'People Potential': [2.0], 'Collaboration': [3.0], 'Empathy': [2.0], 'Sociable': [1.0],
-        'Strategic Potential': [2.0], 'Awareness': [1.0], 'Autonomy': [2.0], 'Perspective': [3.0],
-        'Execution Potential': [2.0], 'Resourcefulness': [2.0], 'Efficacy': [1.0], 'Resilience': [2.0],
-        'Change Potential': [2.0], 'Agility': [1.0], 'Ambiguity': [1.0], 'Venturesome': [3.0],
-        'Steers Changes': [1.0], 'Manages Stakeholders': [1.0], 'Drives Results': [2.0],
-        'Thinks Strategically': [1.0], 'Solves Challenges': [2.0], 'Develops Talent': [4.0]
-    }
-    df_sample = pd.DataFrame(sample_data, columns=columns)
-    
-    # Convert to Excel in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_sample.to_excel(writer, index=False, sheet_name='Candidates')
-    processed_data = output.getvalue()
-    return processed_data
+    return sample_template_bytes()
 
 sample_excel = create_sample_template()
 st.download_button(
@@ -238,82 +54,328 @@ st.download_button(
 
 st.divider()
 
+# --- Generation Settings ---
+with st.sidebar:
+    st.header("⚙️ Generation Settings")
+    max_concurrency = st.slider("Concurrent requests", 1, 32, DEFAULT_MAX_CONCURRENCY)
+    requests_per_minute = st.number_input("Requests per minute", min_value=1, value=DEFAULT_REQUESTS_PER_MINUTE)
+    tokens_per_minute = st.number_input("Tokens per minute", min_value=1000, value=DEFAULT_TOKENS_PER_MINUTE, step=1000)
+    batch_size = st.number_input(
+        "Candidates per request",
+        min_value=1,
+        max_value=50,
+        value=DEFAULT_BATCH_SIZE,
+        help="Pack several candidates into one JSON request; 1 sends one request per candidate.",
+    )
+    chunk_size = st.number_input(
+        "Rows per chunk",
+        min_value=10,
+        value=DEFAULT_CHUNK_SIZE,
+        step=100,
+        help="Rows read, generated and written at a time; bounds memory use on large files.",
+    )
+    output_format = st.radio("Results file format", list(OUTPUT_FORMATS), horizontal=True)
+    force_regenerate = st.checkbox(
+        "Force regenerate",
+        help="Ignore previously generated summaries and call the API for every row.",
+    )
+    local_interpretation = st.checkbox(
+        "Interpret scores locally",
+        value=True,
+        help="Look up score categories and dictionary text before prompting instead of sending the whole dictionary.",
+    )
+    use_context_cache = st.checkbox(
+        "Use context caching",
+        value=True,
+        help="Upload the fixed instructions once as cached content; falls back to a system instruction if unavailable.",
+    )
+    max_retries = st.number_input(
+        "Retries per request",
+        min_value=0,
+        max_value=20,
+        value=DEFAULT_MAX_RETRIES,
+        help="Rate-limit, server and timeout errors are retried with exponential backoff; other errors are not.",
+    )
+    request_timeout = st.number_input(
+        "Request timeout (seconds)",
+        min_value=0,
+        value=int(DEFAULT_REQUEST_TIMEOUT),
+        step=10,
+        help="Abandon and retry a request with no response after this long; 0 waits indefinitely.",
+    )
+    validate_output = st.checkbox(
+        "Validate summaries",
+        value=True,
+        help="Check each summary's format locally and regenerate the ones that break it.",
+    )
+    max_regenerations = st.number_input(
+        "Regenerations per summary",
+        min_value=0,
+        max_value=5,
+        value=DEFAULT_MAX_REGENERATIONS,
+        disabled=not validate_output,
+        help="Summaries still failing validation after this many regenerations are flagged in the results file.",
+    )
+    hedge_requests = st.checkbox(
+        "Hedge slow requests",
+        help="Send a duplicate request when one runs longer than the 95th percentile latency; the first answer wins.",
+    )
+
+run_settings = RunSettings(
+    model_name=MODEL_NAME,
+    max_concurrency=max_concurrency,
+    requests_per_minute=int(requests_per_minute),
+    tokens_per_minute=int(tokens_per_minute),
+    batch_size=int(batch_size),
+    chunk_size=int(chunk_size),
+    local_interpretation=local_interpretation,
+    use_context_cache=use_context_cache,
+    force_regenerate=force_regenerate,
+    output_format=output_format,
+    max_retries=int(max_retries),
+    request_timeout=float(request_timeout),
+    hedge_requests=hedge_requests,
+    validate_output=validate_output,
+    max_regenerations=int(max_regenerations),
+)
+
+
+@st.cache_data(show_spinner=False)
+def estimate_upload_rows(file_id, _uploaded_file):
+    # Cached per upload so reruns do not reread the file; the job counts its rows exactly.
+    return count_rows(_uploaded_file, _uploaded_file.name, exact=False)
+
+
+# --- Background Jobs ---
+# One manager per server process; jobs keep running across script reruns and browser refreshes.
+@st.cache_resource
+def get_job_manager():
+    return jobs.JobManager()
+
+
+def configure_api():
+    try:
+        api_key = st.secrets["GEMINI_API_KEY"]
+        genai.configure(api_key=api_key)
+    except (KeyError, FileNotFoundError):
+        st.error("GEMINI_API_KEY not found. Please add it to your Streamlit secrets.")
+        return False
+    return True
+
+
+def attach_job(job_id):
+    st.session_state['job_id'] = job_id
+    st.query_params['job'] = job_id
+    # Only jobs this session started or was linked to are listed; other users' jobs stay private.
+    session_jobs = st.session_state.setdefault('job_ids', [])
+    if job_id not in session_jobs:
+        session_jobs.append(job_id)
+
+
+def detach_job(job_id):
+    st.session_state['job_ids'] = [i for i in st.session_state.get('job_ids', []) if i != job_id]
+    if st.session_state.get('job_id') == job_id:
+        st.session_state['job_id'] = None
+        st.query_params.pop('job', None)
+
+
+job_manager = get_job_manager()
+# Reattach to this session's job, or to the one named in the URL after a refresh.
+current_job_id = st.session_state.get('job_id') or st.query_params.get('job')
+if current_job_id and current_job_id not in st.session_state.get('job_ids', []) and job_manager.get(current_job_id):
+    attach_job(current_job_id)
+
+
 # --- File Uploader ---
-uploaded_file = st.file_uploader("📂 Upload Your Completed Excel File", type=["xlsx"])
+uploaded_file = st.file_uploader(
+    "📂 Upload Your Completed Candidate File",
+    type=SUPPORTED_INPUT_TYPES,
+    help="Excel (.xlsx), CSV or Parquet. Large files are read and processed in chunks.",
+)
+
+# Only the most recent summaries are rendered on the page; the full set goes to the download.
+MAX_DISPLAYED_SUMMARIES = 20
 
 # --- Main Logic ---
 if uploaded_file is not None:
     try:
-        df = pd.read_excel(uploaded_file)
+        preview = read_head(uploaded_file, uploaded_file.name)
+        total_candidates = estimate_upload_rows(uploaded_file.file_id, uploaded_file)
         st.success("File Uploaded Successfully!")
-        st.dataframe(df)
+        if total_candidates is not None and total_candidates > len(preview):
+            st.caption(f"Showing the first {len(preview)} of about {total_candidates:,} rows.")
+        st.dataframe(preview)
 
         if st.button("🚀 Generate Summaries", type="primary"):
-            # Check for API Key
-            try:
-                api_key = st.secrets["GEMINI_API_KEY"]
-                genai.configure(api_key=api_key)
-            except (KeyError, FileNotFoundError):
-                st.error("GEMINI_API_KEY not found. Please add it to your Streamlit secrets.")
+            if not configure_api():
                 st.stop()
-            
-            # Using Gemini 1.5 Pro based on the user's initial request
-            model = genai.GenerativeModel('gemini-1.5-pro-latest')
-            
-            results = []
-            total_candidates = len(df)
-            progress_bar = st.progress(0, text="Initializing...")
-
-            # Use a container for results to appear as they are generated
-            results_container = st.container()
-
-            for index, row in df.iterrows():
-                progress_text = f"Generating summary for {row['Name']} ({index + 1}/{total_candidates})..."
-                progress_bar.progress((index + 1) / total_candidates, text=progress_text)
-                
-                # Create the data string for the prompt
-                candidate_data_string = "# INPUT SCORES:\n"
-                for col_name, value in row.items():
-                    candidate_data_string += f"# {col_name}: {value}\n"
-
-                # Format the final prompt
-                final_prompt = SAVANT_PROMPT_TEMPLATE.format(candidate_data_string=candidate_data_string)
-                
-                try:
-                    # API Call
-                    response = model.generate_content(final_prompt)
-                    summary = response.text
-                except Exception as e:
-                    summary = f"Error generating summary: {e}"
-                
-                results.append(summary)
-                
-                # Display result immediately
-                with results_container:
-                    st.subheader(f"Summary for {row['Name']}")
-                    st.markdown(summary)
-                    st.divider()
-
-                # A small delay can help prevent hitting API rate limits on rapid, large batches.
-                time.sleep(2) 
-
-            progress_bar.empty()
-            st.success("✅ All summaries generated!")
-            
-            df['Generated Summary'] = results
-            
-            # --- Download Results ---
-            output_results = io.BytesIO()
-            with pd.ExcelWriter(output_results, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Results')
-            
-            st.download_button(
-                label="⬇️ Download All Results with Summaries (Excel)",
-                data=output_results.getvalue(),
-                file_name="candidate_summaries_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            current_job_id = job_manager.submit(uploaded_file.getvalue(), uploaded_file.name, run_settings)
+            attach_job(current_job_id)
 
     except Exception as e:
         st.error(f"An error occurred while processing the file: {e}")
 
+
+def format_seconds(seconds):
+    return f"{seconds:.2f}s" if seconds is not None else "—"
+
+
+def render_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        st.warning(f"Job {job_id} was not found.")
+        return
+    status = job['status']
+    total = job['total_rows']
+    completed = job['completed_rows']
+    stats = job['stats']
+
+    st.subheader(f"Job {job_id} — {job['input_name']}")
+    if status in jobs.ACTIVE_STATUSES:
+        if total:
+            st.progress(min(1.0, completed / total), text=f"Generated {completed:,}/{total:,} summaries...")
+        else:
+            st.progress(0, text=f"Generated {completed:,} summaries...")
+    elif status == jobs.COMPLETED:
+        st.success(f"✅ All {completed:,} summaries generated!")
+    elif status == jobs.FAILED:
+        st.error(f"The job failed after {completed:,} rows: {job['error']}")
+    else:
+        st.warning(f"The job was interrupted after {completed:,} rows.")
+
+    if status in (jobs.FAILED, jobs.INTERRUPTED) and not job_manager.is_alive(job_id):
+        if st.button("▶️ Resume from last checkpoint", key=f"resume-{job_id}"):
+            if configure_api():
+                job_manager.resume(job_id)
+                st.rerun()
+    elif status == jobs.COMPLETED and not job_manager.is_alive(job_id):
+        failed = job_manager.store.failed_rows(job_id)
+        if failed and st.button(f"🔁 Retry {failed:,} failed row(s)", key=f"retry-{job_id}"):
+            if configure_api():
+                job_manager.resume(job_id)
+                st.rerun()
+    if status not in jobs.ACTIVE_STATUSES and not job_manager.is_alive(job_id):
+        retention = (
+            f" Finished jobs are deleted automatically after {job_manager.retention_days} days."
+            if job_manager.retention_days is not None else ""
+        )
+        if st.button(
+            "🗑️ Delete this job's data", key=f"delete-{job_id}",
+            help=f"Removes the uploaded file, the results and the generated summaries.{retention}",
+        ):
+            job_manager.delete(job_id)
+            detach_job(job_id)
+            st.rerun()
+
+    hits_col, misses_col, size_col, calls_col, saved_col = st.columns(5)
+    hits_col.metric("Cache hits", job_manager.store.cache_hits(job_id))
+    misses_col.metric(
+        "Cache misses", stats.get('generated_rows', 0),
+        help="Rows generated by the API, including every row of a forced regeneration.",
+    )
+    size_col.metric("Cached summaries", f"{count_cached_summaries():,}")
+    calls_col.metric("API requests", stats.get('api_requests', 0))
+    # Retries, hedges and regenerations would be sent without batching too.
+    first_pass_requests = stats.get('api_requests', 0) - sum(
+        stats.get(key, 0) for key in ('retried_requests', 'hedged_requests', 'regenerated_rows')
+    )
+    saved_col.metric(
+        "Requests saved by batching",
+        stats.get('generated_rows', 0) - first_pass_requests,
+        help="Compared with sending one request per uncached row.",
+    )
+    prompt_tokens = stats.get('prompt_tokens', 0)
+    requests = stats.get('api_requests', 0)
+    prompt_col, cached_col, output_col, per_request_col = st.columns(4)
+    prompt_col.metric("Prompt tokens", f"{prompt_tokens:,}")
+    cached_col.metric("Cached tokens", f"{stats.get('cached_tokens', 0):,}")
+    output_col.metric("Output tokens", f"{stats.get('output_tokens', 0):,}")
+    per_request_col.metric("Prompt tokens / request", f"{prompt_tokens / requests if requests else 0:,.0f}")
+    if stats.get('throttled'):
+        st.info(f"The API throttled {stats['throttled']} request(s); the rate was reduced automatically.")
+    if stats.get('circuit_opens'):
+        st.warning(
+            f"The API was failing repeatedly; generation paused {stats['circuit_opens']} time(s) until it recovered."
+        )
+    if stats.get('hedged_requests'):
+        st.caption(f"{stats['hedged_requests']:,} slow request(s) were hedged with a duplicate.")
+
+    # --- Run Telemetry ---
+    telemetry = job_manager.store.telemetry(job_id, job)
+    rate_col, error_col, flagged_col, eta_col = st.columns(4)
+    rate_col.metric("Rows / second", f"{telemetry['rows_per_second']:.2f}" if telemetry['rows_per_second'] else "—")
+    error_col.metric("Error rate", f"{telemetry['error_rate']:.1%}", help=f"{telemetry['error_rows']:,} failed row(s).")
+    flagged_col.metric(
+        "Flagged by validation",
+        f"{telemetry['flagged_rows']:,}",
+        help=f"Summaries still breaking the format after regeneration; {telemetry['regenerations']:,} regenerated.",
+    )
+    eta_col.metric("ETA", format_duration(telemetry['eta_seconds']) if status in jobs.ACTIVE_STATUSES else "—")
+    p50_col, p95_col, wait_col, retries_col = st.columns(4)
+    p50_col.metric("API latency p50", format_seconds(telemetry['api_latency_p50_s']))
+    p95_col.metric("API latency p95", format_seconds(telemetry['api_latency_p95_s']))
+    wait_col.metric(
+        "Mean queue wait",
+        format_seconds(telemetry['queue_wait_mean_s']),
+        help="Time rows spent waiting for a worker and the rate limiter.",
+    )
+    retries_col.metric("Retries", telemetry['retries'])
+    metrics_col, prometheus_col = st.columns(2)
+    metrics_col.download_button(
+        label="📈 Download per-row metrics (CSV)",
+        # Built only when clicked; the dashboard redraws every couple of seconds while a job runs.
+        data=lambda: job_manager.store.metrics_csv(job_id),
+        file_name=f"hcta_metrics_{job_id}.csv",
+        mime="text/csv",
+        key=f"metrics-{job_id}",
+    )
+    prometheus_col.download_button(
+        label="📊 Export metrics (Prometheus)",
+        data=lambda: prometheus_text(telemetry, stats, labels={'job': job_id}),
+        file_name=f"hcta_metrics_{job_id}.prom",
+        mime="text/plain",
+        key=f"prometheus-{job_id}",
+    )
+
+    # --- Download Results ---
+    if status == jobs.COMPLETED and job['output_path'] and os.path.exists(job['output_path']):
+        output_format = job['settings'].output_format
+        with open(job['output_path'], 'rb') as results_file:
+            st.download_button(
+                label=f"⬇️ Download All Results with Summaries ({output_format.upper()})",
+                data=results_file,
+                file_name=os.path.basename(job['output_path']),
+                mime=OUTPUT_FORMATS[output_format],
+            )
+
+    recent = job_manager.store.recent_rows(job_id, limit=MAX_DISPLAYED_SUMMARIES)
+    if recent:
+        st.caption(f"Latest {len(recent)} summaries (the download contains all of them).")
+    for row in recent:
+        st.subheader(f"Summary for {row['name']}")
+        if row['issues']:
+            st.warning(f"Failed validation: {row['issues']}")
+        st.markdown(row['summary'])
+        st.divider()
+
+    # The polling fragment stops once the job settles; a full rerun redraws it without the timer.
+    if status not in jobs.ACTIVE_STATUSES and st.session_state.get('job_polling') == job_id:
+        st.session_state['job_polling'] = None
+        st.rerun()
+
+
+if current_job_id:
+    st.divider()
+    current_job = job_manager.get(current_job_id)
+    polling = current_job is not None and current_job['status'] in jobs.ACTIVE_STATUSES
+    st.session_state['job_polling'] = current_job_id if polling else None
+    st.fragment(run_every=2 if polling else None)(render_job)(current_job_id)
+
+with st.expander("🗂️ Your recent jobs"):
+    for job in job_manager.store.list(st.session_state.get('job_ids', [])):
+        job_col, status_col, open_col = st.columns([3, 2, 1])
+        job_col.write(f"`{job['id']}` {job['input_name']}")
+        status_col.write(f"{job['status']} — {job['completed_rows']:,}/{job['total_rows'] or '?'} rows")
+        if open_col.button("Open", key=f"open-{job['id']}"):
+            attach_job(job['id'])
+            st.rerun()
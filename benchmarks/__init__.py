@@ -0,0 +1 @@
+"""Throughput and tail-latency benchmarks against a local mock Gemini API."""
@@ -0,0 +1,210 @@
+"""A local stand-in for the Gemini `generateContent` REST endpoint.
+
+Point the SDK at it with
+
+    genai.configure(api_key='mock', transport='rest',
+                    client_options={'api_endpoint': url})
+
+Latency is drawn per request from a log-normal time-to-first-token plus a
+decode time proportional to the output tokens. 429 and 500 errors are
+injected at configurable rates, and token counts are reported in
+`usageMetadata` the way the real API reports them. Batched prompts (see
+`hcta.batching`) get a JSON object keyed by row id in reply.
+"""
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hcta.interpret import HIGH_THRESHOLD, MODERATE_THRESHOLD
+
+ROW_ID_PATTERN = re.compile(r'### ROW ID: (\S+) ###')
+NAME_PATTERN = re.compile(r'# Name: (.*)')
+GENDER_PATTERN = re.compile(r'# Gender: ([MF])')
+LEVEL_PATTERN = re.compile(r'# Overall Leadership: (?:Demonstrates (\w+) potential|([\d.]+))')
+# The SDK asks for integer enums; 1 is FinishReason.STOP.
+FINISH_REASON_STOP = 1
+
+
+@dataclass
+class MockConfig:
+    ttft_median_ms: float = 200.0
+    ttft_sigma: float = 0.5
+    decode_tokens_per_second: float = 2000.0
+    output_tokens: int = 250
+    error_429_rate: float = 0.0
+    error_500_rate: float = 0.0
+    seed: int = 0
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _level(block):
+    # The Overall Leadership band, from the interpreted sentence or the raw score.
+    match = LEVEL_PATTERN.search(block)
+    if match is None:
+        return 'moderate'
+    if match.group(1):
+        return match.group(1).lower()
+    score = float(match.group(2))
+    return 'high' if score >= HIGH_THRESHOLD else 'moderate' if score >= MODERATE_THRESHOLD else 'low'
+
+
+def synthetic_summary(block):
+    """A format-conforming summary for one candidate block."""
+    name_match = NAME_PATTERN.search(block)
+    name = name_match.group(1).strip() if name_match else 'The candidate'
+    gender_match = GENDER_PATTERN.search(block)
+    subject, possessive = ('She', 'her') if gender_match and gender_match.group(1) == 'F' else ('He', 'his')
+    return (
+        f"{name} demonstrates {_level(block)} potential with a reasonable capacity for growth and success in a more complex role. "
+        f"{subject} works constructively with others and stays composed under pressure. "
+        f"{subject} may enhance impact by sharpening {possessive} focus on longer-term priorities.\n\n"
+        "Strengths:\n"
+        "• Builds constructive relationships and collaborates effectively toward shared goals.\n"
+        "• Maintains a steady, solution-focused approach when facing setbacks.\n\n"
+        "Development Areas:\n"
+        "• Has an opportunity to take greater initiative in ambiguous situations.\n"
+        "• May benefit from connecting day-to-day work to broader organizational priorities."
+    )
+
+
+def _request_text(body):
+    parts = []
+    for section in [body.get('systemInstruction')] + list(body.get('contents') or []):
+        for part in (section or {}).get('parts') or []:
+            parts.append(part.get('text', ''))
+    return parts
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockGeminiHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.counts = {'requests': 0, '429': 0, '500': 0}
+        self.counts_lock = threading.Lock()
+
+    def draw(self):
+        with self.random_lock:
+            return self.random.random(), self.random.lognormvariate(0.0, self.config.ttft_sigma)
+
+    def count(self, key):
+        with self.counts_lock:
+            self.counts[key] += 1
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, code, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith('/stats'):
+            self._send_json(200, dict(self.server.counts))
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if ':generateContent' not in self.path:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+            return
+        config = self.server.config
+        self.server.count('requests')
+        roll, ttft_factor = self.server.draw()
+        time.sleep(config.ttft_median_ms / 1000.0 * ttft_factor)
+
+        if roll < config.error_429_rate:
+            self.server.count('429')
+            self._send_json(429, {'error': {
+                'code': 429, 'message': 'Resource has been exhausted (e.g. check quota).',
+                'status': 'RESOURCE_EXHAUSTED',
+            }})
+            return
+        if roll < config.error_429_rate + config.error_500_rate:
+            self.server.count('500')
+            self._send_json(500, {'error': {
+                'code': 500, 'message': 'An internal error has occurred.', 'status': 'INTERNAL',
+            }})
+            return
+
+        texts = _request_text(body)
+        prompt = texts[-1] if texts else ''
+        row_ids = ROW_ID_PATTERN.findall(prompt)
+        if row_ids:
+            blocks = ROW_ID_PATTERN.split(prompt)[1:]
+            summaries = {row_id: synthetic_summary(block) for row_id, block in zip(blocks[::2], blocks[1::2])}
+            text = json.dumps(summaries)
+            output_tokens = config.output_tokens * len(row_ids)
+        else:
+            text = synthetic_summary(prompt)
+            output_tokens = config.output_tokens
+        time.sleep(output_tokens / config.decode_tokens_per_second)
+
+        prompt_tokens = sum(estimate_tokens(t) for t in texts)
+        self._send_json(200, {
+            'candidates': [{
+                'content': {'parts': [{'text': text}], 'role': 'model'},
+                'finishReason': FINISH_REASON_STOP,
+                'index': 0,
+            }],
+            'usageMetadata': {
+                'promptTokenCount': prompt_tokens,
+                'candidatesTokenCount': output_tokens,
+                'totalTokenCount': prompt_tokens + output_tokens,
+            },
+        })
+
+
+def serve(config, host='127.0.0.1', port=0, ready=None):
+    server = MockGeminiServer((host, port), config)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server_process(config, host='127.0.0.1'):
+    """Run the mock in a separate process; returns `(process, base_url)`."""
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(target=serve, args=(config, host, 0, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=30)
+    return process, f'http://{host}:{port}'
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a mock Gemini generateContent endpoint.')
+    parser.add_argument('--port', type=int, default=8765)
+    for name, value in asdict(MockConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+    config = MockConfig(**{name: getattr(args, name) for name in asdict(MockConfig())})
+    print(f'Mock Gemini API listening on http://127.0.0.1:{args.port}')
+    serve(config, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
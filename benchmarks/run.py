@@ -0,0 +1,285 @@
+"""Benchmark the generation pipeline against the local mock Gemini API.
+
+    python -m benchmarks.run --sizes 10,1000,50000 --output bench.json
+    python -m benchmarks.run --sizes 1000 --baseline bench.json
+
+Each cohort size is generated from the sample-template schema and run in a
+fresh process through the same path the app and CLI use (`build_engine` +
+`generate_file`), so peak RSS is measured per size. Results are written as
+JSON; with `--baseline`, throughput and p95 row latency are compared against
+an earlier run and the exit status is non-zero on a regression.
+
+Row latency runs from a row's submission to the engine until its final result
+(pool and rate-limiter waits, retries and regenerations included); call
+latency is the time of each API request on its own.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from hcta.batching import DEFAULT_BATCH_SIZE
+from hcta.engine import DEFAULT_MAX_CONCURRENCY
+from hcta.pipeline import RunSettings, build_engine, generate_file
+from hcta.template import TEMPLATE_COLUMNS
+
+from .mock_gemini import MockConfig, start_server_process
+
+DEFAULT_SIZES = [10, 1000, 50000]
+
+
+def synthetic_cohort(path, rows, seed=0, chunksize=10_000):
+    """Write `rows` random candidates in the template's column order to a CSV file."""
+    rng = np.random.default_rng(seed)
+    score_columns = TEMPLATE_COLUMNS[2:]
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        for start in range(0, rows, chunksize):
+            count = min(chunksize, rows - start)
+            frame = pd.DataFrame(
+                np.round(rng.uniform(1.0, 5.0, size=(count, len(score_columns))), 1),
+                columns=score_columns,
+            )
+            frame.insert(0, 'Gender', rng.choice(['M', 'F'], size=count))
+            frame.insert(0, 'Name', [f'Candidate {start + i}' for i in range(count)])
+            frame.to_csv(handle, index=False, header=start == 0)
+
+
+def _timed(generate_fn, samples, lock):
+    # Record the latency of every API call.
+    def call(prompt, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return generate_fn(prompt, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+    return call
+
+
+def _timed_rows(run, samples):
+    # Record each row from the moment the engine is handed its chunk until its final result.
+    def call(prompts, on_result=None, **kwargs):
+        submitted = time.perf_counter()
+
+        def record(result):
+            samples.append(time.perf_counter() - submitted)
+            if on_result is not None:
+                on_result(result)
+        return run(prompts, on_result=record, **kwargs)
+    return call
+
+
+def _percentiles_ms(samples):
+    latencies_ms = np.array(samples) * 1000.0 if samples else np.zeros(1)
+    return {
+        'p50': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p95': round(float(np.percentile(latencies_ms, 95)), 2),
+        'p99': round(float(np.percentile(latencies_ms, 99)), 2),
+        'max': round(float(latencies_ms.max()), 2),
+    }
+
+
+def _run_size(input_path, rows, base_url, settings_dict, work_dir, queue):
+    """Child-process body: run one cohort and report its metrics."""
+    import google.generativeai as genai
+
+    genai.configure(api_key='mock', transport='rest', client_options={'api_endpoint': base_url})
+    settings = RunSettings.from_dict(settings_dict)
+    engine, _ = build_engine(settings, cache_path=os.path.join(work_dir, f'cache-{rows}.sqlite3'))
+    call_samples, row_samples, lock = [], [], threading.Lock()
+    engine.generate_fn = _timed(engine.generate_fn, call_samples, lock)
+    engine.batch_generate_fn = _timed(engine.batch_generate_fn, call_samples, lock)
+    engine.run = _timed_rows(engine.run, row_samples)
+    failed = []
+
+    started = time.perf_counter()
+    written = generate_file(
+        engine, input_path, input_path, settings, os.path.join(work_dir, f'out-{rows}.csv'),
+        on_chunk=lambda chunk, results: failed.extend(r for r in results if not r.ok),
+    )
+    wall = time.perf_counter() - started
+    engine.close()
+
+    stats = engine.stats()
+    queue.put({
+        'rows': written,
+        'wall_seconds': round(wall, 3),
+        'rows_per_second': round(written / wall, 3) if wall else None,
+        'row_latency_ms': _percentiles_ms(row_samples),
+        'call_latency_ms': _percentiles_ms(call_samples),
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        'peak_rss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1
+        ),
+        'api_calls': stats['api_requests'],
+        'api_calls_per_row': round(stats['api_requests'] / written, 4) if written else None,
+        'error_rows': len(failed),
+        'throttled': stats['throttled'],
+        'prompt_tokens_per_row': round(stats['prompt_tokens'] / written, 1) if written else None,
+        'output_tokens_per_row': round(stats['output_tokens'] / written, 1) if written else None,
+    })
+
+
+def _wait_for_result(child, results, rows, timeout=None):
+    # Poll so a child that crashes (or hangs past `timeout`) cannot block the harness forever.
+    started = time.monotonic()
+    while True:
+        try:
+            return results.get(timeout=1.0)
+        except queue_module.Empty:
+            pass
+        if child.exitcode is not None:
+            try:
+                # The child may have reported just before exiting.
+                return results.get(timeout=1.0)
+            except queue_module.Empty:
+                raise RuntimeError(
+                    f"Benchmark for {rows:,} rows exited with code {child.exitcode} without reporting results."
+                ) from None
+        if timeout is not None and time.monotonic() - started > timeout:
+            child.terminate()
+            child.join()
+            raise RuntimeError(f"Benchmark for {rows:,} rows did not finish within {timeout:g}s.")
+
+
+def run_benchmarks(sizes, settings, mock_config, seed=0, size_timeout=None):
+    process, base_url = start_server_process(mock_config)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='hcta-bench-') as work_dir:
+            for rows in sizes:
+                input_path = os.path.join(work_dir, f'cohort-{rows}.csv')
+                synthetic_cohort(input_path, rows, seed=seed)
+                queue = context.Queue()
+                child = context.Process(
+                    target=_run_size,
+                    args=(input_path, rows, base_url, settings.to_dict(), work_dir, queue),
+                )
+                child.start()
+                result = _wait_for_result(child, queue, rows, timeout=size_timeout)
+                child.join()
+                results.append(result)
+                latency = result['row_latency_ms']
+                print(
+                    f"{rows:>7,} rows: {result['rows_per_second']:>9,.1f} rows/s, "
+                    f"row p50/p95/p99 {latency['p50']:,.0f}/{latency['p95']:,.0f}/{latency['p99']:,.0f} ms, "
+                    f"call p95 {result['call_latency_ms']['p95']:,.0f} ms, {result['peak_rss_mb']:,.0f} MB peak, "
+                    f"{result['api_calls_per_row']} calls/row",
+                    file=sys.stderr,
+                )
+    finally:
+        process.terminate()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Return regression messages for sizes present in both reports."""
+    previous = {result['rows']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result['rows'])
+        if before is None:
+            continue
+        if result['rows_per_second'] < before['rows_per_second'] * (1 - tolerance):
+            regressions.append(
+                f"{result['rows']:,} rows: throughput {before['rows_per_second']:,.1f} -> {result['rows_per_second']:,.1f} rows/s"
+            )
+        # Reports from before row latency was measured have no comparable figure.
+        if 'row_latency_ms' not in before:
+            continue
+        if result['row_latency_ms']['p95'] > before['row_latency_ms']['p95'] * (1 + tolerance):
+            regressions.append(
+                f"{result['rows']:,} rows: p95 row latency {before['row_latency_ms']['p95']:,.0f} -> "
+                f"{result['row_latency_ms']['p95']:,.0f} ms"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark summary generation against a mock Gemini API.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated cohort sizes')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY * 4)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--rpm', type=int, default=1_000_000, help='client-side requests-per-minute limit')
+    parser.add_argument('--tpm', type=int, default=10_000_000_000, help='client-side tokens-per-minute limit')
+    parser.add_argument('--no-local-interpretation', action='store_true')
+    for name, value in asdict(MockConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value,
+                            help='mock server setting')
+    parser.add_argument('--output', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to compare against')
+    parser.add_argument('--size-timeout', type=float,
+                        help='seconds to allow each cohort size before failing (default: no limit)')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='allowed relative regression before failing (default 0.10)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    mock_config = MockConfig(**{name: getattr(args, name) for name in asdict(MockConfig())})
+    settings = RunSettings(
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        local_interpretation=not args.no_local_interpretation,
+        use_context_cache=False,
+        force_regenerate=True,
+        output_format='csv',
+    )
+
+    report = {
+        'benchmark': 'hcta-generation',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'settings': settings.to_dict(),
+        'mock': asdict(mock_config),
+        'results': run_benchmarks(
+            sizes, settings, mock_config, seed=mock_config.seed, size_timeout=args.size_timeout
+        ),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for message in regressions:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Generation core for the HCTA AI Leadership Potential Report Generator."""
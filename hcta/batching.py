@@ -0,0 +1,60 @@
+"""Multi-candidate batched requests.
+
+Several candidates are packed into one request that asks for a JSON object
+keyed by row id; the reply is split back into per-row summaries. Rows that are
+missing from the reply or malformed are left for the caller to re-queue alone.
+"""
+import json
+
+DEFAULT_BATCH_SIZE = 5
+BATCH_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+BATCH_PROMPT_TEMPLATE = """
+### NEW CANDIDATES TO ANALYZE ###
+Write a separate report for every candidate below, following all instructions for each one independently.
+
+{candidate_blocks}
+
+# AnalystAI, generate the reports now.
+# Respond ONLY with a JSON object that maps each ROW ID (as a string) to that candidate's complete report text,
+# including the paragraph, the "Strengths:" bullets and the "Development Areas:" bullets, e.g. {{"0": "...", "1": "..."}}.
+"""
+
+CANDIDATE_BLOCK_TEMPLATE = """### ROW ID: {row_id} ###
+{candidate_data_string}"""
+
+
+def build_batch_prompt(candidates):
+    """`candidates` is a list of `(row_id, candidate_data_string)` pairs."""
+    candidate_blocks = "\n".join(
+        CANDIDATE_BLOCK_TEMPLATE.format(row_id=row_id, candidate_data_string=data)
+        for row_id, data in candidates
+    )
+    return BATCH_PROMPT_TEMPLATE.format(candidate_blocks=candidate_blocks)
+
+
+def parse_batch_response(text, row_ids):
+    """Split a batched JSON reply into `{row_id: summary}`.
+
+    Only well-formed, non-empty string summaries for the requested row ids are
+    returned; everything else is treated as missing.
+    """
+    try:
+        payload = json.loads(text)
+    except (TypeError, ValueError):
+        return {}
+    if isinstance(payload, list):
+        # Tolerate [{"row_id": ..., "summary": ...}, ...] as well.
+        payload = {
+            str(item.get("row_id")): item.get("summary")
+            for item in payload
+            if isinstance(item, dict)
+        }
+    if not isinstance(payload, dict):
+        return {}
+    summaries = {}
+    for row_id in row_ids:
+        summary = payload.get(str(row_id))
+        if isinstance(summary, str) and summary.strip():
+            summaries[row_id] = summary.strip()
+    return summaries
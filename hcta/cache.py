@@ -0,0 +1,129 @@
+"""Persistent, content-addressed cache of generated summaries.
+
+Entries are keyed by a SHA-256 of the fully rendered prompt together with the
+model name and generation settings, so any change to the prompt, the candidate
+data or the model configuration produces a fresh request.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(".hcta_cache", "responses.sqlite3")
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def cache_key(prompt, model_name, settings=None):
+    payload = json.dumps(
+        {"model": model_name, "settings": settings or {}, "prompt": prompt},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed summary store with LRU size and age eviction."""
+
+    def __init__(self, model_name, settings=None, path=DEFAULT_CACHE_PATH,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.model_name = model_name
+        self.settings = settings or {}
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # WAL plus a generous busy timeout lets several worker processes share one cache file.
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def key(self, prompt):
+        return cache_key(prompt, self.model_name, self.settings)
+
+    def get(self, prompt):
+        """Return the cached summary for `prompt`, or None on a miss."""
+        key = self.key(prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, prompt, text):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, text, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.key(prompt), self.model_name, text, now, now),
+            )
+            self._conn.commit()
+
+    def _expired(self, created_at, now):
+        return self.max_age_days is not None and now - created_at > self.max_age_days * 86400
+
+    def evict(self):
+        """Drop entries past the age limit, then the least recently used beyond `max_entries`."""
+        with self._lock:
+            if self.max_age_days is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (time.time() - self.max_age_days * 86400,),
+                )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def count_cached_summaries(path=DEFAULT_CACHE_PATH):
+    """Number of summaries stored in the cache file at `path` (0 before it exists)."""
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
@@ -0,0 +1,261 @@
+"""Headless command-line entry points for offline batch runs.
+
+    hcta-generate candidates.xlsx -o summaries.xlsx --workers 4
+    hcta-generate candidates.xlsx -o part-1.csv --rows 0:25000      # one host's shard
+    hcta-merge part-1.csv part-2.csv -o summaries.xlsx
+
+`--workers` shards the selected rows across local processes; `--rows` picks a
+row range so a large file can also be split across machines and the shard
+outputs merged afterwards. Per-row request metrics are written next to the
+results and merged with them; `--prometheus` also writes the run summary in
+Prometheus text format and `--otel` records metrics through OpenTelemetry.
+Neither command imports Streamlit.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .batching import DEFAULT_BATCH_SIZE
+from .engine import DEFAULT_MAX_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+from .pipeline import MODEL_NAME, RunSettings, build_engine, generate_file
+from .resilience import DEFAULT_MAX_RETRIES, DEFAULT_REQUEST_TIMEOUT
+from .streaming import (
+    DEFAULT_CHUNK_SIZE,
+    OUTPUT_FORMATS,
+    ResultWriter,
+    count_rows,
+    parse_row_range,
+    read_chunks,
+    sheet_names,
+    sheet_path,
+)
+from .telemetry import METRICS_SHEET, OpenTelemetryRecorder, RunTelemetry, format_duration, prometheus_text, summarize
+from .validate import DEFAULT_MAX_REGENERATIONS
+
+API_KEY_ENV_VARS = ('GEMINI_API_KEY', 'GOOGLE_API_KEY')
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _seconds(value):
+    return '—' if value is None else f'{value:.2f}s'
+
+
+def _output_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in OUTPUT_FORMATS:
+        raise SystemExit(f"Output file must end in one of: {', '.join('.' + f for f in OUTPUT_FORMATS)}")
+    return extension
+
+
+def configure_api(api_key=None):
+    import google.generativeai as genai
+
+    api_key = api_key or next((os.environ[var] for var in API_KEY_ENV_VARS if os.environ.get(var)), None)
+    if not api_key:
+        raise SystemExit(f"No API key found. Set {API_KEY_ENV_VARS[0]} or pass --api-key.")
+    genai.configure(api_key=api_key)
+    return api_key
+
+
+def split_range(start, stop, parts):
+    """Split [start, stop) into at most `parts` contiguous, non-empty ranges."""
+    size = stop - start
+    parts = max(1, min(parts, size))
+    bounds = [start + size * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def run_shard(input_path, start, stop, settings_dict, output_path, api_key, otel=False):
+    """Generate rows [start, stop) into `output_path`; runs in a worker process.
+
+    Returns `(rows, engine stats, per-row metrics records)`.
+    """
+    configure_api(api_key)
+    settings = RunSettings.from_dict(settings_dict)
+    telemetry = RunTelemetry(exporter=OpenTelemetryRecorder() if otel else None)
+    engine, cached_content = build_engine(settings)
+    label = f"rows {start}-{'end' if stop is None else stop - 1}"
+
+    def report(chunk, results):
+        _log(f"[{label}] generated rows {chunk.index[0]}-{chunk.index[-1]}")
+
+    try:
+        rows = generate_file(
+            engine, input_path, input_path, settings, output_path,
+            start=start, stop=stop, on_chunk=report, telemetry=telemetry,
+        )
+    finally:
+        engine.close()
+        if cached_content is not None:
+            try:
+                cached_content.delete()
+            except Exception:
+                pass
+    return rows, engine.stats(), telemetry.records
+
+
+def _metrics_chunks(part_path, chunksize):
+    # A shard's metrics live in its Metrics sheet, or a sibling file for CSV output.
+    if METRICS_SHEET in sheet_names(part_path, part_path):
+        return read_chunks(part_path, part_path, chunksize=chunksize, sheet_name=METRICS_SHEET)
+    metrics_path = sheet_path(part_path, METRICS_SHEET)
+    if os.path.exists(metrics_path):
+        return read_chunks(metrics_path, metrics_path, chunksize=chunksize)
+    return []
+
+
+def merge_outputs(part_paths, output_path, chunksize=DEFAULT_CHUNK_SIZE):
+    """Concatenate shard outputs and their metrics, in the order given, into one results file."""
+    with ResultWriter(output_path, _output_format(output_path)) as writer:
+        for part_path in part_paths:
+            # Shards with no rows leave an empty part; read_chunks yields nothing for them.
+            for chunk in read_chunks(part_path, part_path, chunksize=chunksize):
+                writer.write_frame(chunk)
+        for part_path in part_paths:
+            for chunk in _metrics_chunks(part_path, chunksize):
+                writer.write_frame(chunk, METRICS_SHEET)
+        return writer.rows_written
+
+
+def _settings_from_args(args, workers):
+    # Each worker process gets an equal share of the quota so the aggregate stays within it.
+    return RunSettings(
+        model_name=args.model,
+        max_concurrency=args.concurrency,
+        requests_per_minute=max(1, args.rpm // workers),
+        tokens_per_minute=max(1000, args.tpm // workers),
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        local_interpretation=not args.no_local_interpretation,
+        use_context_cache=not args.no_context_cache,
+        force_regenerate=args.force,
+        output_format=_output_format(args.output),
+        max_retries=args.retries,
+        request_timeout=args.timeout,
+        hedge_requests=args.hedge,
+        validate_output=not args.no_validate,
+        max_regenerations=args.regenerations,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='hcta-generate',
+        description='Generate leadership potential summaries for a candidate file (.xlsx, .csv or .parquet).',
+    )
+    parser.add_argument('input', help='candidate file')
+    parser.add_argument('-o', '--output', required=True, help='results file (.xlsx or .csv)')
+    parser.add_argument('--rows', help='only process the row range START:STOP (0-based, STOP exclusive)')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes to shard the rows across')
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='concurrent requests per worker')
+    parser.add_argument('--rpm', type=int, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help='requests per minute across all workers')
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TOKENS_PER_MINUTE,
+                        help='tokens per minute across all workers')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='candidates per request')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='rows read and written at a time')
+    parser.add_argument('--no-local-interpretation', action='store_true',
+                        help='send the full dictionary instead of locally interpreted scores')
+    parser.add_argument('--no-context-cache', action='store_true', help='do not use context caching')
+    parser.add_argument('--force', action='store_true', help='ignore the response cache')
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='retries for 429 / 5xx / timeout errors, with exponential backoff')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help='seconds before an unanswered request is abandoned and retried (0 for none)')
+    parser.add_argument('--hedge', action='store_true',
+                        help='send a duplicate request when one runs past the p95 latency')
+    parser.add_argument('--no-validate', action='store_true', help='skip the local format check of each summary')
+    parser.add_argument('--regenerations', type=int, default=DEFAULT_MAX_REGENERATIONS,
+                        help='times a summary failing the format check is regenerated before it is flagged')
+    parser.add_argument('--api-key', help=f'defaults to ${API_KEY_ENV_VARS[0]}')
+    parser.add_argument('--prometheus', metavar='PATH', help='also write the run metrics in Prometheus text format')
+    parser.add_argument('--otel', action='store_true',
+                        help='record per-row metrics through OpenTelemetry (needs opentelemetry-api)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    api_key = configure_api(args.api_key)
+    start, stop = parse_row_range(args.rows) if args.rows else (0, None)
+    workers = max(1, args.workers)
+    settings = _settings_from_args(args, workers)
+    started = time.monotonic()
+
+    if args.otel:
+        # Fail before any work starts if the optional dependency is missing.
+        OpenTelemetryRecorder()
+
+    if workers == 1:
+        rows, stats, records = run_shard(args.input, start, stop, settings.to_dict(), args.output, api_key, args.otel)
+    else:
+        if stop is None:
+            total = count_rows(args.input, args.input)
+            if total is None:
+                raise SystemExit("Could not count the input rows; pass --rows START:STOP to shard it.")
+            stop = total
+        shards = split_range(start, stop, workers)
+        if not shards:
+            raise SystemExit("The selected row range is empty.")
+        parts_dir = tempfile.mkdtemp(prefix='hcta-parts-', dir=os.path.dirname(os.path.abspath(args.output)))
+        part_paths = [os.path.join(parts_dir, f'part-{i:04d}.csv') for i in range(len(shards))]
+        # Shards are written as CSV and merged into the requested format at the end.
+        shard_settings = dict(settings.to_dict(), output_format='csv')
+        try:
+            with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+                futures = [
+                    executor.submit(
+                        run_shard, args.input, shard_start, shard_stop, shard_settings, part_path, api_key, args.otel,
+                    )
+                    for (shard_start, shard_stop), part_path in zip(shards, part_paths)
+                ]
+                outcomes = [future.result() for future in futures]
+            rows = merge_outputs(part_paths, args.output, chunksize=settings.chunk_size)
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+        stats = {key: sum(outcome[1][key] for outcome in outcomes) for key in outcomes[0][1]}
+        records = [record for outcome in outcomes for record in outcome[2]]
+
+    elapsed = time.monotonic() - started
+    summary = summarize(records, elapsed=elapsed)
+    _log(
+        f"Wrote {rows:,} rows to {args.output} in {format_duration(elapsed)} "
+        f"({stats['api_requests']:,} API requests, {stats['prompt_tokens']:,} prompt / "
+        f"{stats['cached_tokens']:,} cached / {stats['output_tokens']:,} output tokens)"
+    )
+    _log(
+        f"{summary['rows_per_second'] or 0:,.2f} rows/s, {summary['error_rate']:.1%} errors, "
+        f"{summary['flagged_rows']:,} flagged by validation ({summary['regenerations']:,} regenerated), "
+        f"{summary['retries']:,} retries, API latency p50 {_seconds(summary['api_latency_p50_s'])} / "
+        f"p95 {_seconds(summary['api_latency_p95_s'])}, mean queue wait {_seconds(summary['queue_wait_mean_s'])}"
+    )
+    if args.prometheus:
+        with open(args.prometheus, 'w', encoding='utf-8') as handle:
+            handle.write(prometheus_text(summary, stats, labels={'input': os.path.basename(args.input)}))
+    return 0
+
+
+def merge_main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='hcta-merge',
+        description='Merge shard outputs from hcta-generate --rows into one results file, in the order given.',
+    )
+    parser.add_argument('parts', nargs='+', help='shard result files (.xlsx or .csv)')
+    parser.add_argument('-o', '--output', required=True, help='merged results file (.xlsx or .csv)')
+    args = parser.parse_args(argv)
+    rows = merge_outputs(args.parts, args.output)
+    _log(f"Merged {len(args.parts)} file(s), {rows:,} rows, into {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
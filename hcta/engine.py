@@ -0,0 +1,384 @@
+"""Concurrent summary generation.
+
+`GenerationEngine` fans prompts out over a bounded thread pool, optionally
+packing several rows into one request, paces every call through an
+`AdaptiveRateLimiter`, retries and hedges calls per its `RetryPolicy` and
+hands results back in input order.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from .batching import build_batch_prompt, parse_batch_response
+from .gemini import TokenUsage, finish_reason_from_response, usage_from_response
+from .ratelimit import AdaptiveRateLimiter
+from .resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    RetryPolicy,
+    call_with_deadline,
+    is_quota_error,
+    is_retryable_error,
+)
+from .validate import correction_note
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+
+
+def estimate_tokens(text):
+    # Rough heuristic (~4 characters per token) that is good enough for pacing.
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class GenerationResult:
+    index: int
+    text: str = None
+    error: Exception = None
+    attempts: int = 0
+    cached: bool = False
+    usage: TokenUsage = None
+    # Seconds from submission until the first request went out (pool queue + rate limiter).
+    queue_wait: float = 0.0
+    # Seconds spent inside the API call(s), across all attempts.
+    latency: float = 0.0
+    finish_reason: str = None
+    batched: bool = False
+    # True when a hedged duplicate request produced the response.
+    hedged: bool = False
+    # Times the row was regenerated after failing validation, and what still fails.
+    regenerations: int = 0
+    issues: list = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def retries(self):
+        # Requests resent after an error; regenerations after failed validation are counted apart.
+        return max(0, self.attempts - 1 - self.regenerations)
+
+    @property
+    def error_class(self):
+        return type(self.error).__name__ if self.error is not None else None
+
+    def absorb(self, previous):
+        """Fold an earlier, rejected result for the same row into this one."""
+        self.regenerations = previous.regenerations + 1
+        self.attempts += previous.attempts
+        self.queue_wait += previous.queue_wait
+        self.latency += previous.latency
+        if previous.usage is not None:
+            usage = TokenUsage()
+            usage.add(previous.usage)
+            if self.usage is not None:
+                usage.add(self.usage)
+            self.usage = usage
+
+    @property
+    def summary(self):
+        # Text written to the results file; failures are recorded in the cell.
+        if self.ok:
+            return self.text
+        return f"Error generating summary: {self.error}"
+
+
+@dataclass
+class _Outcome:
+    response: object = None
+    error: Exception = None
+    attempts: int = 0
+    queue_wait: float = 0.0
+    latency: float = 0.0
+    hedged: bool = False
+
+
+class GenerationEngine:
+    """Runs `generate_fn(prompt) -> response` for many prompts concurrently.
+
+    `response` is a Gemini generate_content response, or anything exposing
+    `.text` and optionally `.usage_metadata`. `prompt_overhead_tokens` counts
+    the tokens every request carries besides the prompt itself (the system
+    instruction) so the tokens-per-minute budget is paced correctly.
+    `batch_generate_fn` is used for multi-candidate requests (typically the
+    same model asked for JSON output) and defaults to `generate_fn`.
+    Retryable errors are retried per `retry_policy`; `breaker` pauses every
+    worker while the API keeps failing.
+    """
+
+    def __init__(self, generate_fn, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 limiter=None, retry_policy=None, cache=None, prompt_overhead_tokens=0,
+                 batch_generate_fn=None, breaker=None):
+        self.generate_fn = generate_fn
+        self.batch_generate_fn = batch_generate_fn or generate_fn
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.limiter = limiter or AdaptiveRateLimiter(
+            DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache
+        self.prompt_overhead_tokens = prompt_overhead_tokens
+        self.usage = TokenUsage()
+        # API requests sent and rows that needed one; their difference is what batching saved.
+        self.request_count = 0
+        self.generated_rows = 0
+        self.retried_requests = 0
+        self.hedged_requests = 0
+        self.regenerated_rows = 0
+        self._count_lock = threading.Lock()
+        # Single-row and batch requests differ in size, so their latencies are tracked apart.
+        self._latencies = {'single': LatencyTracker(), 'batch': LatencyTracker()}
+        # Deadline-bound and hedged attempts run here so the caller can stop waiting on them.
+        self._attempt_pool = ThreadPoolExecutor(
+            max_workers=2 * self.max_concurrency, thread_name_prefix='hcta-attempt'
+        )
+
+    def stats(self):
+        """Cumulative counters for this engine, as a JSON-serializable dict."""
+        return {
+            'api_requests': self.request_count,
+            'generated_rows': self.generated_rows,
+            'prompt_tokens': self.usage.prompt,
+            'cached_tokens': self.usage.cached,
+            'output_tokens': self.usage.output,
+            'throttled': self.limiter.throttle_count,
+            'retried_requests': self.retried_requests,
+            'hedged_requests': self.hedged_requests,
+            'regenerated_rows': self.regenerated_rows,
+            'circuit_opens': self.breaker.open_count,
+        }
+
+    def close(self):
+        """Release the attempt threads and trim and close the response cache."""
+        self._attempt_pool.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.evict()
+            self.cache.close()
+
+    def _count(self, counter):
+        with self._count_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _attempt(self, generate_fn, prompt, tokens, kind):
+        """One attempt, bounded by the policy's deadline and hedged past the p95."""
+        policy = self.retry_policy
+        hedge_after = None
+        if policy.hedge:
+            hedge_after = self._latencies[kind].percentile(95, min_samples=policy.hedge_min_samples)
+        if policy.timeout is None and hedge_after is None:
+            return generate_fn(prompt), False
+
+        def try_hedge():
+            # Hedges are opportunistic: never wait on the rate limiter for one.
+            if not self.limiter.try_acquire(tokens):
+                return False
+            self._count('request_count')
+            self._count('hedged_requests')
+            return True
+
+        return call_with_deadline(
+            self._attempt_pool, lambda: generate_fn(prompt),
+            timeout=policy.timeout, hedge_after=hedge_after, try_hedge=try_hedge,
+        )
+
+    def _send(self, generate_fn, prompt, submitted_at, kind='single'):
+        """Call `generate_fn` under the rate limiter and circuit breaker, retrying retryable errors.
+
+        Returns a `_Outcome`; exactly one of its response/error is set.
+        """
+        outcome = _Outcome()
+        tokens = estimate_tokens(prompt) + self.prompt_overhead_tokens
+        while True:
+            self.breaker.wait()
+            self.limiter.acquire(tokens)
+            if outcome.attempts == 0:
+                outcome.queue_wait = time.monotonic() - submitted_at
+            else:
+                self._count('retried_requests')
+            outcome.attempts += 1
+            self._count('request_count')
+            started = time.monotonic()
+            try:
+                outcome.response, outcome.hedged = self._attempt(generate_fn, prompt, tokens, kind)
+            except Exception as e:
+                outcome.latency += time.monotonic() - started
+                if not is_retryable_error(e):
+                    # The API answered, so it is up; this request just cannot succeed.
+                    self.breaker.on_success()
+                    outcome.error = e
+                    return outcome
+                self.breaker.on_failure()
+                if outcome.attempts > self.retry_policy.max_retries:
+                    outcome.error = e
+                    return outcome
+                if is_quota_error(e):
+                    # Slow the whole pool down; the limiter's cooldown paces the retry.
+                    self.limiter.on_throttle()
+                else:
+                    time.sleep(self.retry_policy.backoff(outcome.attempts))
+                continue
+            elapsed = time.monotonic() - started
+            outcome.latency += elapsed
+            self._latencies[kind].add(elapsed)
+            self.breaker.on_success()
+            self.limiter.on_success()
+            return outcome
+
+    def _call(self, index, prompt, submitted_at):
+        outcome = self._send(self.generate_fn, prompt, submitted_at)
+        result = GenerationResult(
+            index=index,
+            error=outcome.error,
+            attempts=outcome.attempts,
+            queue_wait=outcome.queue_wait,
+            latency=outcome.latency,
+            hedged=outcome.hedged,
+        )
+        response = outcome.response
+        if response is not None:
+            try:
+                result.text = response.text
+            except Exception as e:
+                result.error = e
+            result.usage = usage_from_response(response)
+            result.finish_reason = finish_reason_from_response(response)
+        return result
+
+    def _call_batch(self, indices, batch_prompt, submitted_at):
+        """Return `(results, unassigned_usage)` for the rows the batch reply covered.
+
+        Rows missing from `results` must be retried alone. Token usage is shared
+        evenly between the answered rows; `unassigned_usage` carries it when
+        none were answered.
+        """
+        outcome = self._send(self.batch_generate_fn, batch_prompt, submitted_at, kind='batch')
+        response = outcome.response
+        if response is None:
+            return [], None
+        try:
+            summaries = parse_batch_response(response.text, indices)
+        except Exception:
+            summaries = {}
+        usage = usage_from_response(response)
+        if not summaries:
+            return [], usage
+        finish_reason = finish_reason_from_response(response)
+        shares = usage.split(len(summaries))
+        # Like usage, the batch's retries are counted once: against its first answered row.
+        return [
+            GenerationResult(
+                index=index,
+                text=summaries[index],
+                attempts=outcome.attempts if position == 0 else 1,
+                usage=share,
+                queue_wait=outcome.queue_wait,
+                latency=outcome.latency,
+                finish_reason=finish_reason,
+                batched=True,
+                hedged=outcome.hedged,
+            )
+            for position, (index, share) in enumerate(zip([i for i in indices if i in summaries], shares))
+        ], None
+
+    def run(self, prompts, on_result=None, refresh=False, batch_size=1, batch_inputs=None,
+            validate=None, max_regenerations=0):
+        """Generate every prompt and return the results in input order.
+
+        `on_result(result)` is called from the calling thread as each result
+        completes, so it is safe to update the Streamlit UI from it. Prompts
+        found in the cache are answered without an API call unless `refresh`
+        is set; fresh successful responses are written back to it.
+
+        With `batch_size > 1`, uncached rows are sent `batch_size` at a time
+        using `batch_inputs[i]` (defaults to `prompts[i]`) as each row's block
+        in the batch prompt. Rows a batch reply misses are re-queued alone.
+
+        `validate(i, text)` returns the format problems in row i's text. A
+        failing row is regenerated alone, with the problems appended to its
+        prompt, up to `max_regenerations` times; after that it is returned
+        with `issues` set. Only conforming text is cached.
+        """
+        prompts = list(prompts)
+        batch_inputs = prompts if batch_inputs is None else list(batch_inputs)
+        results = [None] * len(prompts)
+
+        def accept(result):
+            # True when the result is final; otherwise it needs regenerating.
+            if validate is None or not result.ok:
+                return True
+            result.issues = validate(result.index, result.text) or None
+            return result.issues is None or result.regenerations >= max_regenerations
+
+        def finish(result):
+            results[result.index] = result
+            if result.usage is not None:
+                self.usage.add(result.usage)
+            if result.ok and not result.cached and not result.issues and self.cache is not None:
+                self.cache.put(prompts[result.index], result.text)
+            if on_result is not None:
+                on_result(result)
+
+        pending = []
+        for index, prompt in enumerate(prompts):
+            text = self.cache.get(prompt) if self.cache is not None and not refresh else None
+            cached = GenerationResult(index=index, text=text, cached=True) if text is not None else None
+            # Entries cached before validation existed may not conform; those rows are generated afresh.
+            if cached is not None and (validate is None or not validate(index, text)):
+                finish(cached)
+            else:
+                pending.append(index)
+        self.generated_rows += len(pending)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # future -> (batch row indices, None) or (None, rejected earlier result for the row)
+            futures = {}
+
+            def submit_single(index, previous=None):
+                prompt = prompts[index]
+                if previous is not None:
+                    prompt += correction_note(previous.issues)
+                    self.regenerated_rows += 1
+                futures[executor.submit(self._call, index, prompt, time.monotonic())] = (None, previous)
+
+            submitted_at = time.monotonic()
+            if batch_size > 1:
+                for start in range(0, len(pending), batch_size):
+                    indices = pending[start:start + batch_size]
+                    batch_prompt = build_batch_prompt([(i, batch_inputs[i]) for i in indices])
+                    futures[executor.submit(self._call_batch, indices, batch_prompt, submitted_at)] = (indices, None)
+            else:
+                for index in pending:
+                    futures[executor.submit(self._call, index, prompts[index], submitted_at)] = (None, None)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    indices, previous = futures.pop(future)
+                    if indices is None:
+                        result = future.result()
+                        if previous is not None:
+                            result.absorb(previous)
+                        if accept(result):
+                            finish(result)
+                        else:
+                            submit_single(result.index, result)
+                        continue
+                    batch_results, unassigned_usage = future.result()
+                    if unassigned_usage is not None:
+                        self.usage.add(unassigned_usage)
+                    answered = set()
+                    for result in batch_results:
+                        answered.add(result.index)
+                        if accept(result):
+                            finish(result)
+                        else:
+                            submit_single(result.index, result)
+                    for index in indices:
+                        if index not in answered:
+                            submit_single(index)
+        return results
@@ -0,0 +1,168 @@
+"""Gemini model construction and token accounting.
+
+The static AnalystAI instructions are attached to the model once, preferably as
+a cached-content object so they are billed at the cached rate, otherwise as a
+plain system instruction. A cached instruction is kept alive for as long as the
+run keeps making requests.
+"""
+import datetime
+import threading
+import time
+from dataclasses import dataclass
+
+DEFAULT_CONTEXT_CACHE_TTL_MINUTES = 60
+
+
+@dataclass
+class TokenUsage:
+    prompt: int = 0
+    cached: int = 0
+    output: int = 0
+    requests: int = 0
+
+    def add(self, other):
+        self.prompt += other.prompt
+        self.cached += other.cached
+        self.output += other.output
+        self.requests += other.requests
+
+    def split(self, parts):
+        """Divide this usage into `parts` near-equal shares that sum back to it."""
+        shares = []
+        for i in range(parts):
+            shares.append(TokenUsage(
+                prompt=self.prompt // parts + (i < self.prompt % parts),
+                cached=self.cached // parts + (i < self.cached % parts),
+                output=self.output // parts + (i < self.output % parts),
+                requests=self.requests if i == 0 else 0,
+            ))
+        return shares
+
+
+def usage_from_response(response):
+    """Read `usage_metadata` off a generate_content response (zeros when absent)."""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return TokenUsage(requests=1)
+    return TokenUsage(
+        prompt=getattr(metadata, "prompt_token_count", 0) or 0,
+        cached=getattr(metadata, "cached_content_token_count", 0) or 0,
+        output=getattr(metadata, "candidates_token_count", 0) or 0,
+        requests=1,
+    )
+
+
+def finish_reason_from_response(response):
+    """Name of the first candidate's finish reason, e.g. 'STOP' or 'MAX_TOKENS'."""
+    candidates = getattr(response, "candidates", None)
+    if not candidates:
+        return None
+    reason = getattr(candidates[0], "finish_reason", None)
+    if reason is None:
+        return None
+    return getattr(reason, "name", str(reason))
+
+
+def is_missing_cache_error(exc):
+    """True when a request failed because its cached content expired or was deleted."""
+    message = str(exc).lower()
+    if "cachedcontent" in message or "cached content" in message:
+        return True
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return False
+    return isinstance(exc, api_exceptions.NotFound)
+
+
+class CachedInstructionModel:
+    """A model reading its instructions from cached content, kept valid for the whole run.
+
+    The cache's TTL is extended whenever less than half of it remains. If the
+    cache cannot be extended or a request finds it gone, the model switches to
+    sending the instruction as a plain system instruction for the rest of the
+    run rather than failing every remaining row.
+    """
+
+    def __init__(self, cached_content, model_name, system_instruction, generation_config=None,
+                 ttl_minutes=DEFAULT_CONTEXT_CACHE_TTL_MINUTES):
+        import google.generativeai as genai
+
+        self.cached_content = cached_content
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.generation_config = generation_config
+        self.ttl = datetime.timedelta(minutes=ttl_minutes)
+        self.using_cache = True
+        self._model = genai.GenerativeModel.from_cached_content(cached_content, generation_config=generation_config)
+        self._expires_at = time.monotonic() + self.ttl.total_seconds()
+        self._lock = threading.Lock()
+
+    def _fall_back(self):
+        import google.generativeai as genai
+
+        if self.using_cache:
+            self.using_cache = False
+            self._model = genai.GenerativeModel(
+                self.model_name,
+                system_instruction=self.system_instruction,
+                generation_config=self.generation_config,
+            )
+
+    def _keep_alive(self):
+        with self._lock:
+            if not self.using_cache or self._expires_at - time.monotonic() > self.ttl.total_seconds() / 2:
+                return
+            try:
+                self.cached_content.update(ttl=self.ttl)
+                self._expires_at = time.monotonic() + self.ttl.total_seconds()
+            except Exception:
+                self._fall_back()
+
+    def generate_content(self, prompt, **kwargs):
+        self._keep_alive()
+        model = self._model
+        try:
+            return model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            if not is_missing_cache_error(e):
+                raise
+            with self._lock:
+                self._fall_back()
+            if self._model is model:
+                raise
+            return self._model.generate_content(prompt, **kwargs)
+
+
+def build_model(model_name, system_instruction, generation_config=None,
+                use_context_cache=True, ttl_minutes=DEFAULT_CONTEXT_CACHE_TTL_MINUTES):
+    """Return `(model, cached_content)` with `system_instruction` attached once.
+
+    Context caching has a minimum token count and is not offered for every
+    model, so any failure to create the cache falls back to sending the
+    instruction as a system instruction; `cached_content` is then None.
+    Otherwise the model is a `CachedInstructionModel`, which keeps the cache
+    alive during long runs.
+    """
+    import google.generativeai as genai
+
+    if use_context_cache:
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=model_name,
+                display_name="hcta-analystai-instructions",
+                system_instruction=system_instruction,
+                ttl=datetime.timedelta(minutes=ttl_minutes),
+            )
+            model = CachedInstructionModel(
+                cached_content, model_name, system_instruction, generation_config, ttl_minutes
+            )
+            return model, cached_content
+        except Exception:
+            pass
+    model = genai.GenerativeModel(
+        model_name,
+        system_instruction=system_instruction,
+        generation_config=generation_config,
+    )
+    return model, None
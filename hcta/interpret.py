@@ -0,0 +1,208 @@
+"""Deterministic score interpretation.
+
+The score banding, strength/development rules and BS <-> TI mapping from the
+AnalystAI instructions are plain table lookups, so they are done here in one
+vectorized pass over the uploaded DataFrame. The model then receives only the
+selected dictionary sentences and pre-classified strength/development
+candidates for each row.
+"""
+import numpy as np
+import pandas as pd
+
+from .template import TEMPLATE_COLUMNS
+
+# Score categorization: High = 3.5-5.0; Moderate = 2.5-3.49; Low = 1.0-2.49.
+HIGH_THRESHOLD = 3.5
+MODERATE_THRESHOLD = 2.5
+# Scores >= 4.0 are only strengths; scores <= 2.0 are only development areas.
+STRENGTH_THRESHOLD = 4.0
+DEVELOPMENT_THRESHOLD = 2.0
+
+IDENTITY_COLUMNS = ['Name', 'Gender']
+# Only the template's assessment columns are scores; IDs, ages and other extra columns are not.
+SCORE_COLUMNS = [col for col in TEMPLATE_COLUMNS if col not in IDENTITY_COLUMNS]
+
+BS_TI_MAPPING = [
+    ('Steers Changes', 'Change Potential'),
+    ('Manages Stakeholders', 'People Potential'),
+    ('Drives Results', 'Drive Potential'),
+    ('Thinks Strategically', 'Strategic Potential'),
+    ('Solves Challenges', 'Execution Potential'),
+    ('Develops Talent', 'Learning Potential'),
+]
+
+PRONOUNS = {'M': 'he/his', 'F': 'she/her'}
+
+BEHAVIORAL_DICTIONARY = {
+    'Overall Leadership': {
+        'High': 'Demonstrates high potential with a strong capacity for growth and success in a more complex role.',
+        'Moderate': 'Demonstrates moderate potential with a reasonable capacity for growth and success in a more complex role.',
+        'Low': 'Demonstrates low potential with a reasonable capacity for growth and success in a more complex role.',
+    },
+    'Reasoning & Problem Solving': {
+        'High': 'Candidate demonstrates a higher-than-average reasoning and problem-solving ability as compared to a group of peers.',
+        'Moderate': 'Candidate demonstrates an average reasoning and problem-solving ability as compared to a group of peers.',
+        'Low': 'Candidate demonstrates a below-average reasoning and problem-solving ability as compared to a group of peers.',
+    },
+    'Steers Changes': {
+        'High': 'Strong ability to recognise and drive change and transformation at an organisational level. Displays strong resilience and strength during adversity and is well equipped to enable buy-in and support.',
+        'Moderate': 'Moderate ability to contribute to organisational change and transformation. Shows resilience during challenging times and can occasionally support others in gaining buy-in.',
+        'Low': 'Limited ability to support change and transformation at an organisational level. Struggles to remain resilient during adversity and has difficulty enabling buy-in and support.',
+    },
+    'Manages Stakeholders': {
+        'High': 'Strong ability to develop and nurture relationships with key stakeholders. Actively finds synergies between organisations to ensure positive outcomes. Networks with stakeholders within and outside one’s industry to stay up-to-date about new developments.',
+        'Moderate': 'Moderate ability to maintain and build relationships with key stakeholders. Occasionally identifies synergies between organisations and engages with stakeholders to stay informed of developments.',
+        'Low': 'Limited ability to develop and maintain relationships with stakeholders. Rarely identifies synergies between organisations or engages with external stakeholders to stay informed.',
+    },
+    'Drives Results': {
+        'High': 'Strong ability to articulate performance standards and metrics that support the achievement of organisational goals. Ensures a high-performance culture across teams and demonstrates grit in achievement of challenging goals.',
+        'Moderate': 'Moderate ability to articulate performance standards and metrics that contribute to achieving organisational goals. Occasionally supports performance across teams and shows persistence when working towards goals.',
+        'Low': 'Low ability to articulate performance standards and metrics that support organisational goals. Needs development in fostering a high-performance culture and in maintaining persistence when faced with challenging goals.',
+    },
+    'Thinks Strategically': {
+        'High': 'Strong ability to balance the achievement of short-term results with creating long-term value and competitive advantage. Successfully translates complex organisational goals into meaningful actions across teams.',
+        'Moderate': 'Moderate ability to balance short-term results with long-term priorities. Occasionally translates organisational goals into meaningful actions across teams.',
+        'Low': 'Low ability to balance short-term performance with long-term value creation. Struggles to translate organisational goals into meaningful team actions.',
+    },
+    'Solves Challenges': {
+        'High': 'Strong ability to deal with ambiguous and complex situations, by making tough decisions where necessary. Is comfortable leading in an environment where goals are frequently complex and thrives during periods of uncertainty.',
+        'Moderate': 'Moderate ability to handle some ambiguous and complex situations by making necessary decisions. Shows some confidence in leading through moderately uncertain environments.',
+        'Low': 'Low ability to deal with ambiguity and complexity. Hesitant to make tough decisions and limited confidence in leading through uncertain situations.',
+    },
+    'Develops Talent': {
+        'High': 'Strong ability to leverage and nurture individual strengths to achieve positive outcomes. Actively fosters a culture of learning and advocates for career advancement opportunities within the organisation.',
+        'Moderate': 'Moderate ability to recognise and utilise individual strengths to support positive outcomes. Supports learning and contributes to career development within the organisation.',
+        'Low': 'Low ability to identify and leverage individual strengths. Rarely supports learning or advocates for career development within the organisation.',
+    },
+    'Drive Potential': {
+        'High': 'Consistently demonstrates a positive mindset and motivation; regularly takes initiative to exceed expectations with a strong drive to achieve goals, targets, and results. Seeks fulfillment through impact.',
+        'Moderate': 'Shows a generally positive mindset and some motivation; occasionally takes initiative and shows a drive to achieve goals, but may need support. Interest in making an impact is present but not sustained.',
+        'Low': 'Demonstrates limited motivation or initiative; may meet expectations but does not show a consistent drive to exceed them. Fulfillment from work or desire to make an impact is not clearly evident.',
+    },
+    'Learning Potential': {
+        'High': 'Consistently takes time to focus on personal and professional growth - for both self and others. Actively pursues continuous improvement and excellence; shows clear willingness to learn and unlearn.',
+        'Moderate': 'Shows some effort toward personal and professional growth. Engages in learning activities but may not do so consistently. Some openness to learning and unlearning.',
+        'Low': 'Rarely focuses on personal or professional growth. Engagement in learning is limited and may resist feedback or change.',
+    },
+    'People Potential': {
+        'High': 'Consistently shows capability to lead and inspire others. Displays strong empathy, understanding, and a focus on people. Builds relationships with ease and enjoys social interactions.',
+        'Moderate': 'Displays some ability to relate to and lead others. May show empathy and focus on people inconsistently. Builds relationships but may need support.',
+        'Low': 'Shows limited capability in leading or inspiring others. Social interaction may be minimal or strained. Struggles to build and maintain relationships.',
+    },
+    'Strategic Potential': {
+        'High': 'Approaches work with a strong focus on the bigger picture. Operates independently with minimal guidance. Demonstrates a commercial and strategic mindset, regularly anticipating trends and their impact.',
+        'Moderate': 'Some awareness of the bigger picture but may need occasional guidance. Understands strategy in parts but may not consistently anticipate trends or broader implications.',
+        'Low': 'Focus tends to be on immediate tasks. Requires frequent guidance. Shows limited awareness of trends or the strategic impact of work.',
+    },
+    'Execution Potential': {
+        'High': 'Consistently addresses problems and challenges with confidence and resilience. Takes a diligent, practical, and solution-focused approach to solving issues.',
+        'Moderate': 'Can address problems but may need support or time to build confidence and resilience. Attempts a practical approach but not always solution-focused.',
+        'Low': 'Struggles to address problems confidently. May rely heavily on others. Practical or solution-oriented approaches are limited.',
+    },
+    'Change Potential': {
+        'High': 'Thrives in change and complexity. Manages new ways of working with adaptability, flexibility, and decisiveness during uncertainty.',
+        'Moderate': 'Generally copes with change and can adapt when needed. May need support to remain flexible or decisive in uncertain situations.',
+        'Low': 'Struggles with change or uncertainty. May resist new ways of working and has difficulty adapting or deciding in changing circumstances.',
+    },
+}
+
+# Headings used when the dictionary is rendered into the system instruction.
+DICTIONARY_GROUPS = [
+    ('Core Competencies', [
+        'Overall Leadership',
+        'Reasoning & Problem Solving',
+    ]),
+    ('Business Simulation (BS) Competencies', [
+        'Steers Changes',
+        'Manages Stakeholders',
+        'Drives Results',
+        'Thinks Strategically',
+        'Solves Challenges',
+        'Develops Talent',
+    ]),
+    ('Thriving Index (TI) Potentials & Factors', [
+        'Drive Potential',
+        'Learning Potential',
+        'People Potential',
+        'Strategic Potential',
+        'Execution Potential',
+        'Change Potential',
+    ]),
+]
+
+
+def categorize(scores):
+    """Map a Series of scores to 'High' / 'Moderate' / 'Low' (None where missing)."""
+    scores = pd.to_numeric(scores, errors='coerce')
+    levels = np.select(
+        [scores >= HIGH_THRESHOLD, scores >= MODERATE_THRESHOLD, scores.notna()],
+        ['High', 'Moderate', 'Low'],
+        default=None,
+    )
+    return pd.Series(levels, index=scores.index, dtype=object)
+
+
+def score_columns(df):
+    return [col for col in df.columns if col in SCORE_COLUMNS]
+
+
+def _join_flagged(mask):
+    # Comma-join the column names flagged True on each row.
+    names = pd.Series(mask.columns, index=mask.columns) + ', '
+    return mask.astype(object).dot(names).where(mask.any(axis=1), '').str.rstrip(', ')
+
+
+def interpret_frame(df):
+    """Return a DataFrame (same index as `df`) of levels, dictionary text and candidates.
+
+    Columns are `<competency> Level` and `<competency> Interpretation` for every
+    dictionary competency present in `df`, plus `Strength Candidates` and
+    `Development Candidates` listing score columns that meet the >= 4.0 / <= 2.0
+    rules.
+    """
+    out = {}
+    for competency, texts in BEHAVIORAL_DICTIONARY.items():
+        if competency not in df.columns:
+            continue
+        levels = categorize(df[competency])
+        out[f'{competency} Level'] = levels
+        out[f'{competency} Interpretation'] = levels.map(texts)
+
+    scores = df[score_columns(df)].apply(pd.to_numeric, errors='coerce')
+    scores = scores.drop(columns=['Overall Leadership'], errors='ignore')
+    out['Strength Candidates'] = _join_flagged(scores >= STRENGTH_THRESHOLD)
+    out['Development Candidates'] = _join_flagged(scores <= DEVELOPMENT_THRESHOLD)
+    return pd.DataFrame(out, index=df.index)
+
+
+def build_interpreted_blocks(df, interpretations=None):
+    """Render one pre-interpreted candidate block per row of `df`, in order."""
+    if interpretations is None:
+        interpretations = interpret_frame(df)
+    blocks = []
+    for (_, row), (_, interp) in zip(df.iterrows(), interpretations.iterrows()):
+        gender = str(row.get('Gender', '')).strip().upper()
+        lines = [
+            '# CANDIDATE:',
+            f"# Name: {row.get('Name', '')}",
+            f"# Gender: {gender} (pronouns: {PRONOUNS.get(gender, 'they/their')})",
+            '# INTERPRETATIONS (USE THIS TEXT EXACTLY):',
+        ]
+        for competency in ('Overall Leadership', 'Reasoning & Problem Solving'):
+            text = interp.get(f'{competency} Interpretation')
+            if isinstance(text, str):
+                lines.append(f'# {competency}: {text}')
+        lines.append('# BS & TI PAIRS:')
+        for bs, ti in BS_TI_MAPPING:
+            bs_text = interp.get(f'{bs} Interpretation')
+            ti_text = interp.get(f'{ti} Interpretation')
+            if isinstance(bs_text, str) or isinstance(ti_text, str):
+                lines.append(f'# {bs} <-> {ti}:')
+                if isinstance(bs_text, str):
+                    lines.append(f'#   - {bs}: {bs_text}')
+                if isinstance(ti_text, str):
+                    lines.append(f'#   - {ti}: {ti_text}')
+        lines.append(f"# STRENGTH CANDIDATES: {interp['Strength Candidates'] or 'None'}")
+        lines.append(f"# DEVELOPMENT CANDIDATES: {interp['Development Candidates'] or 'None'}")
+        blocks.append('\n'.join(lines) + '\n')
+    return blocks
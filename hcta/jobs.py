@@ -0,0 +1,479 @@
+"""Resumable background generation jobs.
+
+Each job runs in its own worker thread, independent of Streamlit script
+reruns, and journals every completed row to SQLite. A UI session only needs
+the job id to reattach; a job interrupted by a crash or restart resumes from
+the rows already in the journal. Uploads, results and journaled summaries hold
+candidate data, so finished jobs are deleted after `retention_days`.
+"""
+import io
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from .pipeline import RunSettings, build_engine, generate_chunks
+from .streaming import ResultWriter, count_rows, read_chunks
+from .telemetry import METRIC_COLUMNS, METRICS_SHEET, metrics_frame, result_metrics
+from .validate import ISSUES_COLUMN, format_issues
+
+DEFAULT_JOBS_DIR = '.hcta_jobs'
+DEFAULT_RETENTION_DAYS = 7
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+INTERRUPTED = 'interrupted'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Running per-job totals -> each journaled row's contribution to them.
+_TOTAL_EXPRESSIONS = {
+    'completed_rows': '1',
+    'error_rows': '1 - ok',
+    'cached_rows': 'cached',
+    'flagged_rows': 'flagged',
+    'regenerations': 'regenerations',
+    'retries': 'retries',
+    'prompt_tokens': 'prompt_tokens',
+    'cached_tokens': 'cached_tokens',
+    'output_tokens': 'output_tokens',
+    'queue_wait_s': 'CASE WHEN cached THEN 0 ELSE queue_wait_s END',
+}
+TOTAL_FIELDS = tuple(_TOTAL_EXPRESSIONS)
+
+
+class JobStore:
+    """SQLite journal of jobs and their completed rows."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Overwrite deleted rows so purged candidate data does not linger in free pages.
+        self._conn.execute("PRAGMA secure_delete=ON")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " input_name TEXT NOT NULL,"
+            " input_path TEXT NOT NULL,"
+            " output_path TEXT,"
+            " settings TEXT NOT NULL,"
+            " stats TEXT NOT NULL DEFAULT '{}',"
+            " total_rows INTEGER,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            " job_id TEXT NOT NULL,"
+            " row_index INTEGER NOT NULL,"
+            " name TEXT,"
+            " summary TEXT NOT NULL,"
+            " ok INTEGER NOT NULL,"
+            " cached INTEGER NOT NULL,"
+            " completed_at REAL NOT NULL,"
+            " PRIMARY KEY (job_id, row_index));"
+            "CREATE TABLE IF NOT EXISTS job_totals ("
+            " job_id TEXT PRIMARY KEY,"
+            + ''.join(f" {field} {'REAL' if field == 'queue_wait_s' else 'INTEGER'} NOT NULL DEFAULT 0," for field in TOTAL_FIELDS)
+            + " rows_since_start INTEGER NOT NULL DEFAULT 0);"
+        )
+        # Journals created before per-row metrics were recorded lack these columns.
+        self._add_missing_columns('jobs', {'started_at': 'REAL'})
+        self._add_missing_columns('job_rows', {
+            'batched': 'INTEGER NOT NULL DEFAULT 0',
+            'hedged': 'INTEGER NOT NULL DEFAULT 0',
+            'regenerations': 'INTEGER NOT NULL DEFAULT 0',
+            'flagged': 'INTEGER NOT NULL DEFAULT 0',
+            'issues': 'TEXT',
+            'queue_wait_s': 'REAL NOT NULL DEFAULT 0',
+            'api_latency_s': 'REAL NOT NULL DEFAULT 0',
+            'retries': 'INTEGER NOT NULL DEFAULT 0',
+            'prompt_tokens': 'INTEGER NOT NULL DEFAULT 0',
+            'cached_tokens': 'INTEGER NOT NULL DEFAULT 0',
+            'output_tokens': 'INTEGER NOT NULL DEFAULT 0',
+            'finish_reason': 'TEXT',
+            'error_class': 'TEXT',
+        })
+        self._conn.executescript(
+            "CREATE INDEX IF NOT EXISTS job_rows_completed ON job_rows (job_id, completed_at);"
+            "CREATE INDEX IF NOT EXISTS job_rows_latency ON job_rows (job_id, cached, api_latency_s);"
+        )
+        self._conn.commit()
+
+    def _add_missing_columns(self, table, columns):
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        for column, definition in columns.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _ensure_totals(self, job_id):
+        # Caller holds the lock. Journals written before totals were kept are summed once.
+        row = self._conn.execute("SELECT * FROM job_totals WHERE job_id = ?", (job_id,)).fetchone()
+        if row is not None:
+            return dict(row)
+        sums = ', '.join(f"COALESCE(SUM({expression}), 0)" for expression in _TOTAL_EXPRESSIONS.values())
+        values = self._conn.execute(f"SELECT {sums} FROM job_rows WHERE job_id = ?", (job_id,)).fetchone()
+        self._conn.execute(
+            f"INSERT INTO job_totals (job_id, {', '.join(TOTAL_FIELDS)}) VALUES (?{', ?' * len(TOTAL_FIELDS)})",
+            (job_id, *values),
+        )
+        return dict(zip(TOTAL_FIELDS, values), job_id=job_id, rows_since_start=0)
+
+    def totals(self, job_id):
+        """Running per-job aggregates (see `TOTAL_FIELDS`), kept up to date by `record_row`."""
+        with self._lock:
+            totals = self._ensure_totals(job_id)
+            self._conn.commit()
+            return totals
+
+    def create(self, job_id, input_name, input_path, settings, total_rows):
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, input_name, input_path, settings, total_rows, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, input_name, input_path, json.dumps(settings.to_dict()), total_rows, now, now),
+        )
+
+    def set_total_rows(self, job_id, total_rows):
+        self._execute("UPDATE jobs SET total_rows = ? WHERE id = ?", (total_rows, job_id))
+
+    def get(self, job_id):
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job['settings'] = RunSettings.from_dict(json.loads(job['settings']))
+        job['stats'] = json.loads(job['stats'])
+        job['completed_rows'] = self.totals(job_id)['completed_rows']
+        return job
+
+    def list(self, job_ids, limit=20):
+        """The most recent of the given jobs, newest first."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        rows = self._query(
+            f"SELECT id FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))}) ORDER BY created_at DESC LIMIT ?",
+            (*job_ids, limit),
+        )
+        return [self.get(row['id']) for row in rows]
+
+    def set_status(self, job_id, status, error=None, output_path=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, output_path = COALESCE(?, output_path), updated_at = ?,"
+                " started_at = CASE WHEN ? THEN ? ELSE started_at END"
+                " WHERE id = ?",
+                (status, error, output_path, now, status == RUNNING, now, job_id),
+            )
+            if status == RUNNING:
+                # Throughput is measured from the latest (re)start.
+                self._ensure_totals(job_id)
+                self._conn.execute("UPDATE job_totals SET rows_since_start = 0 WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def set_stats(self, job_id, stats):
+        self._execute(
+            "UPDATE jobs SET stats = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(stats), time.time(), job_id),
+        )
+
+    def record_row(self, job_id, row_index, name, result):
+        """Journal one row and fold it into the job's running totals (replacing any earlier attempt)."""
+        metrics = result_metrics(row_index, name, result)
+        contribution = f"SELECT {', '.join(_TOTAL_EXPRESSIONS.values())} FROM job_rows WHERE job_id = ? AND row_index = ?"
+        with self._lock:
+            self._ensure_totals(job_id)
+            previous = self._conn.execute(contribution, (job_id, metrics['row'])).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_rows (job_id, row_index, name, summary, ok, cached, batched, hedged,"
+                " regenerations, flagged, issues, queue_wait_s, api_latency_s, retries, prompt_tokens,"
+                " cached_tokens, output_tokens, finish_reason, error_class, completed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id, metrics['row'], name, result.summary, int(metrics['ok']), int(metrics['cached']),
+                    int(metrics['batched']), int(metrics['hedged']), metrics['regenerations'], int(metrics['flagged']),
+                    format_issues(result.issues), metrics['queue_wait_s'], metrics['api_latency_s'],
+                    metrics['retries'], metrics['prompt_tokens'], metrics['cached_tokens'], metrics['output_tokens'],
+                    metrics['finish_reason'], metrics['error_class'], time.time(),
+                ),
+            )
+            current = self._conn.execute(contribution, (job_id, metrics['row'])).fetchone()
+            previous = previous or [0] * len(TOTAL_FIELDS)
+            self._conn.execute(
+                f"UPDATE job_totals SET {', '.join(f'{field} = {field} + ?' for field in TOTAL_FIELDS)},"
+                " rows_since_start = rows_since_start + 1 WHERE job_id = ?",
+                (*(new - old for new, old in zip(current, previous)), job_id),
+            )
+            self._conn.commit()
+
+    def completed_row_indices(self, job_id):
+        """Rows checkpointed as done; rows that failed are generated again on resume."""
+        rows = self._query("SELECT row_index FROM job_rows WHERE job_id = ? AND ok = 1", (job_id,))
+        return {row['row_index'] for row in rows}
+
+    def summaries(self, job_id, row_indices):
+        """Map row index -> (summary, validation issues) for the journaled rows among `row_indices`."""
+        row_indices = [int(i) for i in row_indices]
+        if not row_indices:
+            return {}
+        rows = self._query(
+            "SELECT row_index, summary, issues FROM job_rows"
+            " WHERE job_id = ? AND row_index BETWEEN ? AND ?",
+            (job_id, min(row_indices), max(row_indices)),
+        )
+        return {row['row_index']: (row['summary'], row['issues']) for row in rows}
+
+    def recent_rows(self, job_id, limit=20):
+        return [dict(row) for row in self._query(
+            "SELECT row_index, name, summary, ok, issues FROM job_rows WHERE job_id = ?"
+            " ORDER BY completed_at DESC LIMIT ?",
+            (job_id, limit),
+        )]
+
+    def _metrics_query(self, job_id, where='', params=(), limit=-1):
+        columns = ', '.join('row_index AS row' if field == 'row' else field for field in METRIC_COLUMNS)
+        rows = self._query(
+            f"SELECT {columns} FROM job_rows WHERE job_id = ?{where} ORDER BY row_index LIMIT ?",
+            (job_id, *params, limit),
+        )
+        return pd.DataFrame([tuple(row) for row in rows], columns=list(METRIC_COLUMNS))
+
+    def iter_metrics(self, job_id, chunksize):
+        """Yield the job's metrics records in row order, `chunksize` rows at a time."""
+        last = -1
+        while True:
+            frame = self._metrics_query(job_id, ' AND row_index > ?', (last,), limit=chunksize)
+            if frame.empty:
+                return
+            last = int(frame['row'].iloc[-1])
+            yield frame
+
+    def metrics_csv(self, job_id, chunksize=5000):
+        """The job's Metrics sheet as CSV text, read a chunk at a time."""
+        buffer = io.StringIO()
+        for i, records in enumerate(self.iter_metrics(job_id, chunksize)):
+            metrics_frame(records).to_csv(buffer, index=False, header=i == 0)
+        return buffer.getvalue()
+
+    def _latency_percentile(self, job_id, generated, q):
+        # Nearest-rank percentile over the (job_id, cached, api_latency_s) index.
+        if not generated:
+            return None
+        rows = self._query(
+            "SELECT api_latency_s FROM job_rows WHERE job_id = ? AND cached = 0"
+            " ORDER BY api_latency_s LIMIT 1 OFFSET ?",
+            (job_id, min(generated - 1, int(round(q / 100 * (generated - 1))))),
+        )
+        return float(rows[0][0]) if rows else None
+
+    def telemetry(self, job_id, job=None):
+        """Live run summary from the running totals; throughput and ETA cover rows since the job (re)started."""
+        job = job or self.get(job_id)
+        if job is None:
+            return None
+        totals = self.totals(job_id)
+        completed = totals['completed_rows']
+        generated = completed - totals['cached_rows']
+        summary = {
+            'completed_rows': completed,
+            'error_rows': totals['error_rows'],
+            'error_rate': totals['error_rows'] / completed if completed else 0.0,
+            'flagged_rows': totals['flagged_rows'],
+            'regenerations': totals['regenerations'],
+            'rows_per_second': None,
+            'eta_seconds': None,
+            'api_latency_p50_s': self._latency_percentile(job_id, generated, 50),
+            'api_latency_p95_s': self._latency_percentile(job_id, generated, 95),
+            'queue_wait_mean_s': totals['queue_wait_s'] / generated if generated else None,
+            'retries': totals['retries'],
+            'prompt_tokens': totals['prompt_tokens'],
+            'cached_tokens': totals['cached_tokens'],
+            'output_tokens': totals['output_tokens'],
+        }
+        if job['started_at'] is not None and totals['rows_since_start']:
+            end = time.time() if job['status'] in ACTIVE_STATUSES else job['updated_at']
+            rows_per_second = totals['rows_since_start'] / max(1e-9, end - job['started_at'])
+            summary['rows_per_second'] = rows_per_second
+            if job['total_rows'] is not None:
+                summary['eta_seconds'] = max(0, job['total_rows'] - completed) / rows_per_second
+        return summary
+
+    def failed_rows(self, job_id):
+        return self.totals(job_id)['error_rows']
+
+    def cache_hits(self, job_id):
+        return self.totals(job_id)['cached_rows']
+
+    def delete(self, job_id):
+        """Remove a job and everything journaled for it."""
+        with self._lock:
+            for table, column in (('job_rows', 'job_id'), ('job_totals', 'job_id'), ('jobs', 'id')):
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (job_id,))
+            self._conn.commit()
+
+    def finished_before(self, cutoff):
+        """Ids of jobs that are not active and were last updated before `cutoff` (epoch seconds)."""
+        rows = self._query(
+            f"SELECT id FROM jobs WHERE updated_at < ? AND status NOT IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+            (cutoff, *ACTIVE_STATUSES),
+        )
+        return [row['id'] for row in rows]
+
+    def mark_interrupted(self):
+        """Flag jobs left active by a previous process; their threads no longer exist."""
+        self._execute(
+            f"UPDATE jobs SET status = ?, updated_at = ? WHERE status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+            (INTERRUPTED, time.time(), *ACTIVE_STATUSES),
+        )
+
+
+def _merge_stats(base, current):
+    return {key: base.get(key, 0) + value for key, value in current.items()}
+
+
+class JobManager:
+    """Starts, tracks and resumes generation jobs; one worker thread per job.
+
+    Create a single manager per process (e.g. with `st.cache_resource`): on
+    construction it flags jobs a previous process left running as interrupted.
+    Jobs finished more than `retention_days` ago (None keeps them) are deleted
+    on construction and whenever a job is submitted.
+    """
+
+    def __init__(self, root=DEFAULT_JOBS_DIR, engine_factory=build_engine, retention_days=DEFAULT_RETENTION_DAYS):
+        self.root = root
+        self.engine_factory = engine_factory
+        self.retention_days = retention_days
+        self.store = JobStore(os.path.join(root, 'jobs.sqlite3'))
+        self.store.mark_interrupted()
+        self._threads = {}
+        self._lock = threading.Lock()
+        self.purge_expired()
+
+    def submit(self, data, input_name, settings):
+        """Persist the uploaded bytes and start a job; returns its id."""
+        self.purge_expired()
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.root, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        input_path = os.path.join(job_dir, f"input{os.path.splitext(input_name)[1].lower()}")
+        with open(input_path, 'wb') as handle:
+            handle.write(data)
+        # The exact row count can take seconds for a large workbook, so the worker takes it.
+        self.store.create(job_id, input_name, input_path, settings, None)
+        self._start(job_id)
+        return job_id
+
+    def resume(self, job_id):
+        """Restart an interrupted or failed job from its last journaled row."""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if self.is_alive(job_id):
+            return
+        self.store.set_status(job_id, QUEUED)
+        self._start(job_id)
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def delete(self, job_id):
+        """Delete a job's upload, results and journal; a running job is left alone (returns False)."""
+        if self.is_alive(job_id):
+            return False
+        self.store.delete(job_id)
+        shutil.rmtree(os.path.join(self.root, job_id), ignore_errors=True)
+        with self._lock:
+            self._threads.pop(job_id, None)
+        return True
+
+    def purge_expired(self):
+        """Delete jobs that finished more than `retention_days` ago; returns how many."""
+        if self.retention_days is None:
+            return 0
+        expired = self.store.finished_before(time.time() - self.retention_days * 86400)
+        return sum(self.delete(job_id) for job_id in expired)
+
+    def is_alive(self, job_id):
+        with self._lock:
+            thread = self._threads.get(job_id)
+            return thread is not None and thread.is_alive()
+
+    def _start(self, job_id):
+        thread = threading.Thread(target=self._run, args=(job_id,), name=f"hcta-job-{job_id}", daemon=True)
+        with self._lock:
+            self._threads[job_id] = thread
+        thread.start()
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        settings = job['settings']
+        base_stats = job['stats']
+        self.store.set_status(job_id, RUNNING)
+        try:
+            engine, cached_content = self.engine_factory(settings)
+        except Exception as e:
+            self.store.set_status(job_id, FAILED, error=str(e))
+            return
+        try:
+            if job['total_rows'] is None:
+                self.store.set_total_rows(job_id, count_rows(job['input_path'], job['input_name']))
+
+            def journal(row, result):
+                self.store.record_row(job_id, row.name, str(row.get('Name', '')), result)
+
+            done = self.store.completed_row_indices(job_id)
+            for _ in generate_chunks(
+                engine, job['input_path'], job['input_name'], settings,
+                on_result=journal, skip_rows=done,
+            ):
+                self.store.set_stats(job_id, _merge_stats(base_stats, engine.stats()))
+
+            output_path = os.path.join(
+                os.path.dirname(job['input_path']),
+                f"candidate_summaries_results.{settings.output_format}",
+            )
+            with ResultWriter(output_path, settings.output_format) as writer:
+                for chunk in read_chunks(job['input_path'], job['input_name'], chunksize=settings.chunk_size):
+                    summaries = self.store.summaries(job_id, chunk.index)
+                    rows = [summaries.get(int(i), (None, None)) for i in chunk.index]
+                    chunk['Generated Summary'] = [summary for summary, _ in rows]
+                    if settings.validate_output:
+                        chunk[ISSUES_COLUMN] = [issues for _, issues in rows]
+                    writer.write_frame(chunk)
+                for records in self.store.iter_metrics(job_id, settings.chunk_size):
+                    writer.write_frame(metrics_frame(records), METRICS_SHEET)
+            self.store.set_stats(job_id, _merge_stats(base_stats, engine.stats()))
+            self.store.set_status(job_id, COMPLETED, output_path=output_path)
+        except Exception as e:
+            self.store.set_status(job_id, FAILED, error=str(e))
+        finally:
+            engine.close()
+            if cached_content is not None:
+                try:
+                    cached_content.delete()
+                except Exception:
+                    pass
@@ -0,0 +1,171 @@
+"""End-to-end generation over a candidate file.
+
+`RunSettings` captures every knob the UI exposes, `build_engine` turns it into
+a ready `GenerationEngine`, and `generate_chunks` streams a file through it one
+chunk at a time.
+"""
+from dataclasses import asdict, dataclass, field
+
+from .batching import BATCH_GENERATION_CONFIG, DEFAULT_BATCH_SIZE
+from .cache import ResponseCache
+from .engine import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    GenerationEngine,
+    estimate_tokens,
+)
+from .gemini import build_model
+from .prompt import build_candidate_blocks, system_instruction_for, wrap_candidate_block
+from .ratelimit import AdaptiveRateLimiter
+from .resilience import DEFAULT_MAX_RETRIES, DEFAULT_REQUEST_TIMEOUT, RetryPolicy
+from .streaming import DEFAULT_CHUNK_SIZE, ResultWriter, read_chunks
+from .telemetry import METRICS_SHEET, metrics_frame, result_metrics
+from .validate import DEFAULT_MAX_REGENERATIONS, ISSUES_COLUMN, format_issues, validate_summary
+
+# Using Gemini 1.5 Pro based on the user's initial request
+MODEL_NAME = 'gemini-1.5-pro-latest'
+
+
+@dataclass
+class RunSettings:
+    model_name: str = MODEL_NAME
+    generation_config: dict = field(default_factory=dict)
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE
+    tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE
+    batch_size: int = DEFAULT_BATCH_SIZE
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    local_interpretation: bool = True
+    use_context_cache: bool = True
+    force_regenerate: bool = False
+    output_format: str = 'xlsx'
+    max_retries: int = DEFAULT_MAX_RETRIES
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+    hedge_requests: bool = False
+    validate_output: bool = True
+    max_regenerations: int = DEFAULT_MAX_REGENERATIONS
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {name: value for name, value in data.items() if name in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+def build_engine(settings, cache_path=None):
+    """Return `(engine, cached_content)` configured from `settings`.
+
+    `genai.configure(api_key=...)` must already have been called. The caller
+    owns `cached_content` (may be None) and `engine.cache`, and should delete /
+    close them when the run finishes.
+    """
+    system_instruction = system_instruction_for(settings.local_interpretation)
+    # The static instructions are attached to the model once; each request only carries the candidate block.
+    model, cached_content = build_model(
+        settings.model_name,
+        system_instruction,
+        generation_config=settings.generation_config or None,
+        use_context_cache=settings.use_context_cache,
+    )
+    cache_kwargs = {'path': cache_path} if cache_path else {}
+    cache = ResponseCache(
+        settings.model_name,
+        {'generation_config': settings.generation_config, 'system_instruction': system_instruction},
+        **cache_kwargs,
+    )
+    # The HTTP timeout matches the engine's per-attempt deadline so abandoned calls do not linger, and the
+    # SDK's own retry is switched off: the engine's RetryPolicy, rate limiter and circuit breaker own retries.
+    request_options = {'retry': None}
+    if settings.request_timeout:
+        request_options['timeout'] = settings.request_timeout
+    engine = GenerationEngine(
+        lambda prompt: model.generate_content(prompt, request_options=request_options),
+        max_concurrency=settings.max_concurrency,
+        limiter=AdaptiveRateLimiter(settings.requests_per_minute, settings.tokens_per_minute),
+        retry_policy=RetryPolicy(
+            max_retries=settings.max_retries,
+            timeout=settings.request_timeout or None,
+            hedge=settings.hedge_requests,
+        ),
+        cache=cache,
+        prompt_overhead_tokens=estimate_tokens(system_instruction),
+        batch_generate_fn=lambda prompt: model.generate_content(
+            prompt, generation_config=BATCH_GENERATION_CONFIG, request_options=request_options
+        ),
+    )
+    return engine, cached_content
+
+
+def generate_chunk(engine, chunk, settings, on_result=None):
+    """Generate summaries for one DataFrame chunk; results are in row order.
+
+    `on_result(row, result)` is called as each row completes, with the row's
+    Series from `chunk` (`row.name` is its index label).
+    """
+    # Score banding and dictionary lookups are done locally when enabled, so the model only sees the selected text.
+    candidate_blocks = build_candidate_blocks(chunk, interpreted=settings.local_interpretation)
+    prompts = [wrap_candidate_block(block) for block in candidate_blocks]
+    callback = None
+    if on_result is not None:
+        def callback(result):
+            on_result(chunk.iloc[result.index], result)
+    validate = None
+    if settings.validate_output:
+        def validate(index, text):
+            return validate_summary(text, chunk.iloc[index])
+    return engine.run(
+        prompts,
+        on_result=callback,
+        refresh=settings.force_regenerate,
+        batch_size=settings.batch_size,
+        batch_inputs=candidate_blocks,
+        validate=validate,
+        max_regenerations=settings.max_regenerations,
+    )
+
+
+def generate_chunks(engine, source, name, settings, on_result=None, skip_rows=(), start=0, stop=None):
+    """Stream `source` through the engine, yielding `(chunk, results)` per chunk.
+
+    Only rows in [start, stop) are read. Rows whose index is in `skip_rows`
+    (e.g. already journaled by a job) are left out of the chunk passed to the
+    engine.
+    """
+    skip_rows = set(skip_rows)
+    for chunk in read_chunks(source, name, chunksize=settings.chunk_size, start=start, stop=stop):
+        if skip_rows:
+            chunk = chunk[~chunk.index.isin(skip_rows)]
+        if chunk.empty:
+            continue
+        yield chunk, generate_chunk(engine, chunk, settings, on_result=on_result)
+
+
+def generate_file(engine, source, name, settings, output_path, start=0, stop=None, on_chunk=None,
+                  telemetry=None):
+    """Generate summaries for rows [start, stop) of `source` and write them to `output_path`.
+
+    Results are written chunk by chunk in `settings.output_format`, with
+    per-row request metrics in a Metrics sheet (a sibling CSV for CSV output).
+    Each row's metrics are also passed to `telemetry` (a `RunTelemetry`) when
+    given. `on_chunk(chunk, results)` is called after each chunk is written.
+    Returns the number of rows written.
+    """
+    with ResultWriter(output_path, settings.output_format) as writer:
+        for chunk, results in generate_chunks(engine, source, name, settings, start=start, stop=stop):
+            names = chunk['Name'] if 'Name' in chunk.columns else [None] * len(chunk)
+            record = telemetry.record if telemetry is not None else result_metrics
+            records = [
+                record(label, row_name, result)
+                for label, row_name, result in zip(chunk.index, names, results)
+            ]
+            chunk['Generated Summary'] = [result.summary for result in results]
+            if settings.validate_output:
+                chunk[ISSUES_COLUMN] = [format_issues(result.issues) for result in results]
+            writer.write_frame(chunk)
+            writer.write_frame(metrics_frame(records), METRICS_SHEET)
+            if on_chunk is not None:
+                on_chunk(chunk, results)
+        return writer.rows_written
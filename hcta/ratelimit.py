@@ -0,0 +1,122 @@
+"""Client-side rate limiting for Gemini requests.
+
+Requests and tokens are each metered by a token bucket. When the API answers
+with a 429 / quota error the limiter cuts its effective rate and cools down,
+then creeps back up to the configured limits as calls start succeeding again.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """A bucket holding up to `capacity` units, refilled at `rate` units per second."""
+
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # Seconds until `amount` units are available (0 when they already are).
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter that backs off on throttling.
+
+    `factor` scales both buckets' refill rates. Every throttle halves it (down to
+    `min_factor`) and blocks all callers for a cooldown; every success raises it
+    by `recovery_step` until the configured limits are reached again.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None,
+                 min_factor=0.1, recovery_step=0.05, cooldown=5.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_factor = min_factor
+        self.recovery_step = recovery_step
+        self.cooldown = cooldown
+        self.factor = 1.0
+        self.throttle_count = 0
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(
+            capacity=max(1.0, requests_per_minute / 60.0),
+            rate=requests_per_minute / 60.0,
+        )
+        self._tokens = None
+        if tokens_per_minute:
+            self._tokens = TokenBucket(
+                capacity=tokens_per_minute / 60.0 * 10,
+                rate=tokens_per_minute / 60.0,
+            )
+
+    def _buckets(self):
+        return [b for b in (self._requests, self._tokens) if b is not None]
+
+    def _apply_factor(self):
+        self._requests.rate = self.requests_per_minute / 60.0 * self.factor
+        if self._tokens is not None:
+            self._tokens.rate = self.tokens_per_minute / 60.0 * self.factor
+
+    def _take(self, tokens):
+        # Consume one request and `tokens` if available; otherwise return the seconds to wait.
+        with self._lock:
+            now = time.monotonic()
+            wait = self._cooldown_until - now
+            if wait > 0:
+                return wait
+            for bucket in self._buckets():
+                bucket.refill(now)
+            wait = max(
+                self._requests.wait_time(1),
+                self._tokens.wait_time(tokens) if self._tokens is not None else 0.0,
+            )
+            if wait <= 0:
+                self._requests.consume(1)
+                if self._tokens is not None:
+                    self._tokens.consume(tokens)
+            return wait
+
+    def acquire(self, tokens=1):
+        """Block until one request carrying `tokens` prompt tokens may be sent."""
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self, tokens=1):
+        """Like `acquire`, but return False instead of waiting when over the limit."""
+        return self._take(tokens) <= 0
+
+    def on_success(self):
+        with self._lock:
+            if self.factor < 1.0:
+                self.factor = min(1.0, self.factor + self.recovery_step)
+                self._apply_factor()
+
+    def on_throttle(self, retry_after=None):
+        """Record a 429 / quota response and slow every caller down."""
+        with self._lock:
+            self.throttle_count += 1
+            self.factor = max(self.min_factor, self.factor / 2)
+            self._apply_factor()
+            pause = retry_after if retry_after is not None else self.cooldown
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + pause)
+            # Drain the buckets so the burst allowance is not spent straight after the pause.
+            for bucket in self._buckets():
+                bucket.level = 0.0
+                bucket.updated = self._cooldown_until
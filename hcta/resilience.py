@@ -0,0 +1,208 @@
+"""Retries, deadlines, hedged requests and a circuit breaker for Gemini calls.
+
+Errors are split into retryable ones (429 / quota, 5xx, timeouts and dropped
+connections), which are retried with exponential backoff and full jitter, and
+fatal ones (bad requests, blocked prompts, auth), which fail the row at once.
+Each attempt can be given a deadline and, once enough latencies have been
+seen, a duplicate "hedge" request is sent when an attempt outlives the p95 so
+a few slow calls do not hold up a large run. Consecutive retryable failures
+open a `CircuitBreaker` that pauses every worker until the API recovers.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_REQUEST_TIMEOUT = 120.0
+
+
+class RequestTimeout(TimeoutError):
+    """An attempt got no response within its deadline."""
+
+
+def is_quota_error(exc):
+    """True for 429 / quota-exhausted responses from the Gemini API."""
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        api_exceptions = None
+    if api_exceptions is not None and isinstance(
+        exc, (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+    ):
+        return True
+    message = str(exc).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+def is_retryable_error(exc):
+    """True for errors worth retrying: quota, server-side (5xx), timeouts and connection drops."""
+    if is_quota_error(exc) or isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        api_exceptions = None
+    if api_exceptions is not None:
+        if isinstance(exc, (api_exceptions.ServerError, api_exceptions.DeadlineExceeded)):
+            return True
+        if isinstance(exc, api_exceptions.GoogleAPICallError):
+            # Any other status from the API (400, 403, 404, ...) will fail the same way again.
+            return False
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    if requests is not None and isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in ("500", "502", "503", "504", "unavailable", "timed out"))
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently a request is retried.
+
+    `timeout` is the per-attempt deadline in seconds (None waits forever).
+    With `hedge`, a duplicate request is sent when an attempt has run longer
+    than the p95 of recent latencies (after `hedge_min_samples` of them).
+    """
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    timeout: float = DEFAULT_REQUEST_TIMEOUT
+    hedge: bool = False
+    hedge_min_samples: int = 20
+
+    def backoff(self, retry, rng=random):
+        """Seconds to sleep before retry number `retry` (1-based): full-jitter exponential backoff."""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=1):
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            return float(np.percentile(self._samples, q))
+
+
+class CircuitBreaker:
+    """Pauses all callers after `failure_threshold` consecutive retryable failures.
+
+    While open, `wait()` blocks every worker. After `reset_timeout` seconds a
+    single probe request is let through (half-open): success closes the
+    breaker and releases everyone, another failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.open_count = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._condition = threading.Condition()
+
+    def wait(self):
+        """Block until a request may be sent."""
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.state = self.HALF_OPEN
+                        return
+                    self._condition.wait(remaining)
+                else:
+                    # A probe is in flight; wait for its outcome.
+                    self._condition.wait()
+
+    def on_success(self):
+        """The API answered (even with a non-retryable error), so it is reachable."""
+        with self._condition:
+            self._failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self._condition.notify_all()
+
+    def on_failure(self):
+        with self._condition:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.open_count += 1
+                self._opened_at = time.monotonic()
+                self._condition.notify_all()
+
+
+def call_with_deadline(executor, fn, timeout=None, hedge_after=None, try_hedge=None):
+    """Run `fn()` on `executor` and return `(result, hedged)`.
+
+    Raises `RequestTimeout` if no call succeeds within `timeout` seconds. When
+    `hedge_after` is set and the call is still running after that many
+    seconds, a second copy is started if `try_hedge()` allows it (e.g. the
+    rate limiter has room); the first successful copy wins. Abandoned calls are
+    left to finish in the background.
+    """
+    started = time.monotonic()
+    futures = {executor.submit(fn)}
+    hedged = hedge_after is None
+    error = None
+    while futures:
+        elapsed = time.monotonic() - started
+        limits = []
+        if timeout is not None:
+            limits.append(timeout - elapsed)
+        if not hedged:
+            limits.append(hedge_after - elapsed)
+        if limits and min(limits) <= 0:
+            if timeout is not None and elapsed >= timeout:
+                raise RequestTimeout(f"No response from the API within {timeout:g}s")
+            hedged = True
+            if try_hedge is None or try_hedge():
+                futures.add(executor.submit(fn))
+                return _first_success(futures, started, timeout, error)
+            continue
+        done, futures = wait(futures, timeout=min(limits) if limits else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), False
+            error = future.exception()
+    raise error
+
+
+def _first_success(futures, started, timeout, error):
+    # Both the original and the hedge are in flight; return whichever succeeds first.
+    while futures:
+        remaining = None if timeout is None else timeout - (time.monotonic() - started)
+        if remaining is not None and remaining <= 0:
+            raise RequestTimeout(f"No response from the API within {timeout:g}s")
+        done, futures = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True
+            error = future.exception()
+    raise error
@@ -0,0 +1,276 @@
+"""Memory-bounded reading and writing of candidate files.
+
+Input is read in fixed-size chunks (openpyxl read-only mode for `.xlsx`,
+pandas' chunked reader for CSV, row-group batches for Parquet) and results are
+written row by row as each chunk completes, to an xlsxwriter `constant_memory`
+workbook or a CSV file. Peak memory is bounded by the chunk size rather than
+the size of the file.
+"""
+import csv
+import os
+from itertools import islice
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 500
+PREVIEW_ROWS = 100
+SUPPORTED_INPUT_TYPES = ['xlsx', 'csv', 'parquet']
+OUTPUT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+}
+
+
+def _file_type(name):
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    if extension not in SUPPORTED_INPUT_TYPES:
+        raise ValueError(f"Unsupported file type '.{extension}'. Use one of: {', '.join(SUPPORTED_INPUT_TYPES)}.")
+    return extension
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _xlsx_chunks(source, chunksize, sheet_name=None):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) if col is not None else f'Unnamed: {i}' for i, col in enumerate(header)]
+        # Read-only sheets often report trailing blank rows; skip them.
+        rows = (row for row in rows if any(value is not None for value in row))
+        while True:
+            block = list(islice(rows, chunksize))
+            if not block:
+                return
+            yield pd.DataFrame(block, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _parquet_chunks(source, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires the 'pyarrow' package.") from e
+
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def read_chunks(source, name, chunksize=DEFAULT_CHUNK_SIZE, start=0, stop=None, sheet_name=None):
+    """Yield DataFrames of at most `chunksize` rows from an .xlsx/.csv/.parquet file.
+
+    `source` is a path or binary file object; `name` is used to pick the reader.
+    Each chunk keeps a running RangeIndex so row positions are global. `start`
+    and `stop` restrict reading to the row range [start, stop), e.g. one shard.
+    `sheet_name` selects an .xlsx worksheet other than the active one.
+    """
+    file_type = _file_type(name)
+    _rewind(source)
+    if file_type == 'xlsx':
+        chunks = _xlsx_chunks(source, chunksize, sheet_name)
+    elif file_type == 'csv':
+        # Skip the leading rows in the parser rather than materializing them.
+        try:
+            chunks = pd.read_csv(source, chunksize=chunksize, skiprows=range(1, start + 1) if start else None)
+        except pd.errors.EmptyDataError:
+            # A zero-byte file (e.g. a shard that had no rows) holds no data.
+            return
+    else:
+        chunks = _parquet_chunks(source, chunksize)
+    position = start if file_type == 'csv' else 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(position, position + len(chunk))
+        position += len(chunk)
+        if position <= start:
+            continue
+        if stop is not None and chunk.index[0] >= stop:
+            return
+        chunk = chunk[(chunk.index >= start) & ((chunk.index < stop) if stop is not None else True)]
+        if not chunk.empty:
+            yield chunk
+
+
+def parse_row_range(text):
+    """Parse 'START:STOP' (either side optional) into `(start, stop)`."""
+    start_text, sep, stop_text = text.partition(':')
+    if not sep:
+        raise ValueError(f"Row range '{text}' must look like START:STOP.")
+    start = int(start_text) if start_text.strip() else 0
+    stop = int(stop_text) if stop_text.strip() else None
+    if start < 0 or (stop is not None and stop < start):
+        raise ValueError(f"Invalid row range '{text}'.")
+    return start, stop
+
+
+def read_head(source, name, rows=PREVIEW_ROWS):
+    """Return only the first `rows` rows, for previewing large files."""
+    head = next(read_chunks(source, name, chunksize=rows), None)
+    return head if head is not None else pd.DataFrame()
+
+
+def count_rows(source, name, exact=True):
+    """Count the data rows `read_chunks` would yield, without holding them in memory (None when unknown).
+
+    An exact .xlsx count reads every row; with `exact=False` the sheet's
+    recorded dimensions are used instead, which is instant but also counts
+    formatted blank rows.
+    """
+    file_type = _file_type(name)
+    _rewind(source)
+    if file_type == 'xlsx':
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            if not exact:
+                max_row = workbook.active.max_row
+                return max(0, max_row - 1) if max_row is not None else None
+            # `max_row` also counts formatted blank rows, so count the rows that have values instead.
+            rows = workbook.active.iter_rows(values_only=True)
+            if next(rows, None) is None:
+                return 0
+            return sum(1 for row in rows if any(value is not None for value in row))
+        finally:
+            workbook.close()
+    if file_type == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+        return pq.ParquetFile(source).metadata.num_rows
+    # CSV: count lines in a single streaming pass.
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as handle:
+            return max(0, sum(1 for _ in handle) - 1)
+    total = max(0, sum(1 for _ in source) - 1)
+    _rewind(source)
+    return total
+
+
+def _cell(value):
+    # xlsxwriter and csv both want None for missing values, not NaN/NaT.
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def sheet_names(source, name):
+    """Worksheet names of an .xlsx file (empty for other formats)."""
+    if _file_type(name) != 'xlsx':
+        return []
+    from openpyxl import load_workbook
+
+    _rewind(source)
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def sheet_path(path, sheet_name):
+    """Where a secondary sheet of a CSV results file is written, e.g. `out.metrics.csv`."""
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{sheet_name.lower()}{extension}"
+
+
+class _CsvSheet:
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.handle)
+
+    def write_row(self, values):
+        self.writer.writerow(['' if value is None else value for value in values])
+
+    def close(self):
+        self.handle.close()
+
+
+class _XlsxSheet:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.next_row = 0
+
+    def write_row(self, values):
+        self.worksheet.write_row(self.next_row, 0, values)
+        self.next_row += 1
+
+    def close(self):
+        pass
+
+
+class ResultWriter:
+    """Append rows to an .xlsx (constant memory) or .csv results file.
+
+    Rows must be written in order within each sheet; a sheet's header is
+    written with its first chunk. Sheets other than the main one become extra
+    worksheets in .xlsx output and sibling files (see `sheet_path`) for CSV.
+    """
+
+    def __init__(self, path, output_format='xlsx', sheet_name='Results'):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format '{output_format}'.")
+        self.path = path
+        self.output_format = output_format
+        self.sheet_name = sheet_name
+        self.rows_written = 0
+        self._sheets = {}
+        self._workbook = None
+        if output_format == 'xlsx':
+            import xlsxwriter
+
+            self._workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        self._sheet(sheet_name)
+
+    @property
+    def mime_type(self):
+        return OUTPUT_FORMATS[self.output_format]
+
+    def _sheet(self, sheet_name):
+        if sheet_name not in self._sheets:
+            if self._workbook is not None:
+                self._sheets[sheet_name] = _XlsxSheet(self._workbook.add_worksheet(sheet_name))
+            else:
+                path = self.path if sheet_name == self.sheet_name else sheet_path(self.path, sheet_name)
+                self._sheets[sheet_name] = _CsvSheet(path)
+            self._sheets[sheet_name].columns = None
+        return self._sheets[sheet_name]
+
+    def write_frame(self, df, sheet_name=None):
+        sheet = self._sheet(sheet_name or self.sheet_name)
+        if sheet.columns is None:
+            sheet.write_row([str(col) for col in df.columns])
+            sheet.columns = list(df.columns)
+        for row in df.itertuples(index=False, name=None):
+            sheet.write_row([_cell(value) for value in row])
+        if sheet_name in (None, self.sheet_name):
+            self.rows_written += len(df)
+
+    def close(self):
+        for sheet in self._sheets.values():
+            sheet.close()
+        self._sheets = {}
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,186 @@
+"""Per-request instrumentation and run-level telemetry.
+
+Every generated row gets a metrics record (queue wait, API latency, retries,
+token counts from `usage_metadata`, finish reason and error class). Records
+are aggregated into a live run summary, written as a Metrics sheet next to the
+results, and can be exported in Prometheus text format or to OpenTelemetry.
+"""
+import numpy as np
+import pandas as pd
+
+METRICS_SHEET = 'Metrics'
+
+# Record field -> column heading in the Metrics sheet.
+METRIC_COLUMNS = {
+    'row': 'Row',
+    'name': 'Name',
+    'ok': 'Succeeded',
+    'cached': 'Cached',
+    'batched': 'Batched',
+    'hedged': 'Hedged',
+    'regenerations': 'Regenerations',
+    'flagged': 'Failed Validation',
+    'queue_wait_s': 'Queue Wait (s)',
+    'api_latency_s': 'API Latency (s)',
+    'retries': 'Retries',
+    'prompt_tokens': 'Prompt Tokens',
+    'cached_tokens': 'Cached Tokens',
+    'output_tokens': 'Output Tokens',
+    'finish_reason': 'Finish Reason',
+    'error_class': 'Error Class',
+}
+
+
+def result_metrics(row_index, name, result):
+    """Flatten a `GenerationResult` into a metrics record."""
+    usage = result.usage
+    return {
+        'row': int(row_index),
+        'name': name,
+        'ok': result.ok,
+        'cached': result.cached,
+        'batched': result.batched,
+        'hedged': result.hedged,
+        'regenerations': result.regenerations,
+        'flagged': bool(result.issues),
+        'queue_wait_s': round(result.queue_wait, 4),
+        'api_latency_s': round(result.latency, 4),
+        'retries': result.retries,
+        'prompt_tokens': usage.prompt if usage else 0,
+        'cached_tokens': usage.cached if usage else 0,
+        'output_tokens': usage.output if usage else 0,
+        'finish_reason': result.finish_reason,
+        'error_class': result.error_class,
+    }
+
+
+def metrics_frame(records):
+    """Records (dicts or a DataFrame with record fields) -> Metrics sheet DataFrame."""
+    frame = pd.DataFrame(records, columns=list(METRIC_COLUMNS))
+    return frame.rename(columns=METRIC_COLUMNS)
+
+
+def summarize(records, total_rows=None, elapsed=None):
+    """Aggregate metrics records into throughput, error rate, ETA and latency figures.
+
+    `elapsed` is the wall-clock seconds the records took to produce; without
+    it throughput and ETA are left as None.
+    """
+    frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records, columns=list(METRIC_COLUMNS))
+    completed = len(frame)
+    errors = int((~frame['ok'].astype(bool)).sum()) if completed else 0
+    generated = frame[~frame['cached'].astype(bool)] if completed else frame
+    latencies = generated['api_latency_s'].to_numpy(dtype=float)
+    rows_per_second = completed / elapsed if elapsed and completed else None
+    remaining = max(0, total_rows - completed) if total_rows is not None else None
+    return {
+        'completed_rows': completed,
+        'error_rows': errors,
+        'error_rate': errors / completed if completed else 0.0,
+        'flagged_rows': int(frame['flagged'].astype(bool).sum()) if completed else 0,
+        'regenerations': int(frame['regenerations'].sum()) if completed else 0,
+        'rows_per_second': rows_per_second,
+        'eta_seconds': remaining / rows_per_second if rows_per_second and remaining is not None else None,
+        'api_latency_p50_s': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'api_latency_p95_s': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'queue_wait_mean_s': float(generated['queue_wait_s'].mean()) if len(generated) else None,
+        'retries': int(frame['retries'].sum()) if completed else 0,
+        'prompt_tokens': int(frame['prompt_tokens'].sum()) if completed else 0,
+        'cached_tokens': int(frame['cached_tokens'].sum()) if completed else 0,
+        'output_tokens': int(frame['output_tokens'].sum()) if completed else 0,
+    }
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '—'
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{hours}h {minutes:02d}m' if hours else f'{minutes}m {seconds:02d}s'
+
+
+def prometheus_text(summary, stats=None, labels=None):
+    """Render a run summary (and engine stats) in the Prometheus text exposition format."""
+    label_text = ''
+    if labels:
+        label_text = '{' + ','.join(f'{key}="{value}"' for key, value in sorted(labels.items())) + '}'
+    metrics = [
+        ('hcta_rows_completed', 'gauge', 'Rows with a summary or error recorded.', summary['completed_rows']),
+        ('hcta_rows_failed', 'gauge', 'Rows whose generation failed.', summary['error_rows']),
+        ('hcta_error_ratio', 'gauge', 'Failed rows / completed rows.', summary['error_rate']),
+        ('hcta_rows_flagged', 'gauge', 'Rows still failing format validation.', summary['flagged_rows']),
+        ('hcta_regenerations_total', 'counter', 'Rows regenerated after failing validation.', summary['regenerations']),
+        ('hcta_rows_per_second', 'gauge', 'Completed rows per second of wall-clock time.', summary['rows_per_second']),
+        ('hcta_eta_seconds', 'gauge', 'Estimated seconds until every row is done.', summary['eta_seconds']),
+        ('hcta_api_latency_p50_seconds', 'gauge', 'Median API latency of generated rows.', summary['api_latency_p50_s']),
+        ('hcta_api_latency_p95_seconds', 'gauge', '95th percentile API latency of generated rows.', summary['api_latency_p95_s']),
+        ('hcta_queue_wait_mean_seconds', 'gauge', 'Mean time rows waited for a worker and the rate limiter.', summary['queue_wait_mean_s']),
+        ('hcta_retries_total', 'counter', 'Request retries.', summary['retries']),
+        ('hcta_prompt_tokens_total', 'counter', 'Prompt tokens reported by the API.', summary['prompt_tokens']),
+        ('hcta_cached_tokens_total', 'counter', 'Cached prompt tokens reported by the API.', summary['cached_tokens']),
+        ('hcta_output_tokens_total', 'counter', 'Output tokens reported by the API.', summary['output_tokens']),
+    ]
+    if stats:
+        metrics += [
+            ('hcta_api_requests_total', 'counter', 'API requests sent.', stats.get('api_requests', 0)),
+            ('hcta_throttled_total', 'counter', 'Requests answered with 429 / quota errors.', stats.get('throttled', 0)),
+            ('hcta_retried_requests_total', 'counter', 'Requests sent as retries.', stats.get('retried_requests', 0)),
+            ('hcta_hedged_requests_total', 'counter', 'Duplicate requests sent past the p95 latency.',
+             stats.get('hedged_requests', 0)),
+            ('hcta_circuit_opens_total', 'counter', 'Times the circuit breaker paused the run.',
+             stats.get('circuit_opens', 0)),
+        ]
+    lines = []
+    for name, kind, help_text, value in metrics:
+        if value is None:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name}{label_text} {value}']
+    return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryRecorder:
+    """Records per-row metrics through the OpenTelemetry metrics API, if installed.
+
+    The global meter provider is used, so exporters are configured the usual
+    OpenTelemetry way (SDK setup or `opentelemetry-instrument`).
+    """
+
+    def __init__(self, meter_name='hcta'):
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError("OpenTelemetry export requires the 'opentelemetry-api' package.") from e
+        meter = metrics.get_meter(meter_name)
+        self._rows = meter.create_counter('hcta.rows', description='Completed rows')
+        self._latency = meter.create_histogram('hcta.api_latency', unit='s', description='API latency per row')
+        self._queue_wait = meter.create_histogram('hcta.queue_wait', unit='s', description='Queue wait per row')
+        self._tokens = meter.create_counter('hcta.tokens', description='Tokens reported by the API')
+
+    def record(self, record):
+        attributes = {
+            'ok': bool(record['ok']),
+            'cached': bool(record['cached']),
+            'error_class': record['error_class'] or '',
+        }
+        self._rows.add(1, attributes)
+        if not record['cached']:
+            self._latency.record(record['api_latency_s'], attributes)
+            self._queue_wait.record(record['queue_wait_s'], attributes)
+        for kind in ('prompt', 'cached', 'output'):
+            self._tokens.add(record[f'{kind}_tokens'], {'kind': kind})
+
+
+class RunTelemetry:
+    """In-memory collector for one run (used by the CLI)."""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self.records = []
+
+    def record(self, row_index, name, result):
+        record = result_metrics(row_index, name, result)
+        self.records.append(record)
+        if self.exporter is not None:
+            self.exporter.record(record)
+        return record
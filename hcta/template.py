@@ -0,0 +1,40 @@
+"""Input column schema and the downloadable sample template."""
+import io
+
+import pandas as pd
+
+# Define all expected columns in the new, specific order
+TEMPLATE_COLUMNS = [
+    'Name', 'Gender', 'Overall Leadership', 'Reasoning & Problem Solving',
+    'Drive Potential', 'Contribution', 'Purpose', 'Achievement',
+    'Learning Potential', 'Mastery', 'Growth', 'Insightful',
+    'People Potential', 'Collaboration', 'Empathy', 'Sociable',
+    'Strategic Potential', 'Awareness', 'Autonomy', 'Perspective',
+    'Execution Potential', 'Resourcefulness', 'Efficacy', 'Resilience',
+    'Change Potential', 'Agility', 'Ambiguity', 'Venturesome',
+    'Steers Changes', 'Manages Stakeholders', 'Drives Results',
+    'Thinks Strategically', 'Solves Challenges', 'Develops Talent'
+]
+
+# A sample row
+SAMPLE_ROW = {
+    'Name': 'Jane Doe', 'Gender': 'F', 'Overall Leadership': 2.0, 'Reasoning & Problem Solving': 1.0,
+    'Drive Potential': 3.0, 'Contribution': 2.0, 'Purpose': 3.0, 'Achievement': 4.0,
+    'Learning Potential': 4.0, 'Mastery': 4.0, 'Growth': 5.0, 'Insightful': 3.0,
+    'People Potential': 2.0, 'Collaboration': 3.0, 'Empathy': 2.0, 'Sociable': 1.0,
+    'Strategic Potential': 2.0, 'Awareness': 1.0, 'Autonomy': 2.0, 'Perspective': 3.0,
+    'Execution Potential': 2.0, 'Resourcefulness': 2.0, 'Efficacy': 1.0, 'Resilience': 2.0,
+    'Change Potential': 2.0, 'Agility': 1.0, 'Ambiguity': 1.0, 'Venturesome': 3.0,
+    'Steers Changes': 1.0, 'Manages Stakeholders': 1.0, 'Drives Results': 2.0,
+    'Thinks Strategically': 1.0, 'Solves Challenges': 2.0, 'Develops Talent': 4.0
+}
+
+
+def sample_template_bytes():
+    df_sample = pd.DataFrame([SAMPLE_ROW], columns=TEMPLATE_COLUMNS)
+
+    # Convert to Excel in memory
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df_sample.to_excel(writer, index=False, sheet_name='Candidates')
+    return output.getvalue()
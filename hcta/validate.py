@@ -0,0 +1,122 @@
+"""Local checks that a generated summary follows the required format.
+
+`validate_summary` runs on each response as it arrives and returns a list of
+problems (empty when the summary conforms). The engine regenerates failing
+rows with `correction_note` appended to the prompt, up to a limit, and rows
+that still fail are flagged in the results file.
+"""
+import re
+
+import pandas as pd
+
+from .interpret import categorize
+
+MAX_PARAGRAPH_WORDS = 200
+EXPECTED_BULLETS = 2
+DEFAULT_MAX_REGENERATIONS = 2
+ISSUES_COLUMN = 'Validation Issues'
+
+STRENGTHS_HEADING = re.compile(r'^\W*strengths\W*$', re.IGNORECASE | re.MULTILINE)
+DEVELOPMENT_HEADING = re.compile(r'^\W*development areas\W*$', re.IGNORECASE | re.MULTILINE)
+BULLET_MARKER = re.compile(r'^\s*(?:[•\-*–·]|\d+[.)])\s+', re.MULTILINE)
+BULLET = re.compile(BULLET_MARKER.pattern + r'\S')
+# Score-like numbers only ("3.5", "4/5", "4 out of 5", "scored 4", "(4)"); counts such as "3 teams" or
+# "360-degree" are fine. Bullet markers and the candidate's name are removed first.
+SCORE = re.compile(
+    r'(?<![\w.])\d+\.\d+(?![\w.]*\w)'
+    r'|\b\d+\s*(?:/|out of)\s*\d+\b'
+    r'|\b(?:scor(?:e|es|ed|ing)|rat(?:ed|ing|ings))\s*(?:of|at|:|=)?\s*(?:an?\s+)?\d'
+    r'|\(\s*\d+(?:\.\d+)?\s*\)',
+    re.IGNORECASE,
+)
+WORD = re.compile(r"[\w'’-]+")
+SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+# Initials and titles ("John A. Smith", "Dr. Chen") whose full stop does not end a sentence.
+ABBREVIATION = re.compile(r'\b(?:Mr|Mrs|Ms|Mx|Dr|Prof|[A-Z])\.')
+
+# Pronouns that must not appear for each `Gender` value.
+WRONG_PRONOUNS = {
+    'M': re.compile(r'\b(she|her|hers|herself)\b', re.IGNORECASE),
+    'F': re.compile(r'\b(he|him|his|himself)\b', re.IGNORECASE),
+}
+
+
+def _bullets(section):
+    return [line for line in section.splitlines() if BULLET.match(line)]
+
+
+def _first_sentence(paragraph, name):
+    if name:
+        paragraph = paragraph.replace(name, 'The candidate')
+    paragraph = ABBREVIATION.sub(lambda match: match.group(0)[:-1], paragraph)
+    return SENTENCE_END.split(paragraph, 1)[0]
+
+
+def _opening_matches(first_sentence, level):
+    # "Demonstrates high potential ..." as well as "... demonstrates high leadership potential ...".
+    pattern = rf'\bdemonstrates\s+(?:an?\s+)?{level}\b[^.]*?\bpotential\b'
+    return re.search(pattern, first_sentence, re.IGNORECASE) is not None
+
+
+def validate_summary(text, row):
+    """Return the format problems in `text`, the summary generated for candidate `row`."""
+    if not isinstance(text, str) or not text.strip():
+        return ['the summary is empty']
+    issues = []
+    strengths = STRENGTHS_HEADING.search(text)
+    development = DEVELOPMENT_HEADING.search(text)
+    if strengths is None or development is None:
+        issues.append('missing the "Strengths:" or "Development Areas:" heading')
+        headings = [match.start() for match in (strengths, development) if match]
+        paragraph = text[:min(headings)] if headings else text
+    elif strengths.start() > development.start():
+        issues.append('"Strengths:" must come before "Development Areas:"')
+        paragraph = text[:development.start()]
+    else:
+        paragraph = text[:strengths.start()]
+        for heading, section in (
+            ('Strengths', text[strengths.end():development.start()]),
+            ('Development Areas', text[development.end():]),
+        ):
+            count = len(_bullets(section))
+            if count != EXPECTED_BULLETS:
+                issues.append(f'expected {EXPECTED_BULLETS} "{heading}" bullets, found {count}')
+
+    paragraph = paragraph.strip()
+    words = len(WORD.findall(paragraph))
+    if words >= MAX_PARAGRAPH_WORDS:
+        issues.append(f'the paragraph has {words} words (must be under {MAX_PARAGRAPH_WORDS})')
+    if '\n\n' in paragraph:
+        issues.append('the summary must be a single paragraph before the bullets')
+
+    name = str(row.get('Name', '') or '').strip()
+    level = categorize(pd.Series([row.get('Overall Leadership')])).iloc[0]
+    if level is not None and not _opening_matches(_first_sentence(paragraph, name), level):
+        issues.append(f'the paragraph must open with the Overall Leadership sentence ({level.lower()} potential)')
+
+    scrubbed = BULLET_MARKER.sub('', text.replace(name, '') if name else text)
+    if SCORE.search(scrubbed):
+        issues.append('the summary mentions numeric scores')
+
+    gender = str(row.get('Gender', '')).strip().upper()
+    wrong = WRONG_PRONOUNS.get(gender)
+    if wrong is not None:
+        found = sorted({match.lower() for match in wrong.findall(text)})
+        if found:
+            issues.append(f'pronouns ({", ".join(found)}) do not match Gender {gender}')
+    return issues
+
+
+def correction_note(issues):
+    """Text appended to a prompt when its previous answer failed validation."""
+    lines = '\n'.join(f'# - {issue}' for issue in issues)
+    return (
+        '\n\n# --- CORRECTION ---\n'
+        '# A previous answer for this candidate broke the required format:\n'
+        f'{lines}\n'
+        '# Write the summary again, following every rule and the exact output format.'
+    )
+
+
+def format_issues(issues):
+    return '; '.join(issues) if issues else None
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from hcta.batching import build_batch_prompt, parse_batch_response
+
+
+def test_build_batch_prompt_labels_every_row():
+    prompt = build_batch_prompt([(3, 'first block'), (7, 'second block')])
+    assert '### ROW ID: 3 ###\nfirst block' in prompt
+    assert '### ROW ID: 7 ###\nsecond block' in prompt
+    assert '{"0": "...", "1": "..."}' in prompt
+
+
+def test_parse_batch_response_splits_by_row_id():
+    text = json.dumps({'3': ' Summary three. ', '7': 'Summary seven.'})
+    assert parse_batch_response(text, [3, 7]) == {3: 'Summary three.', 7: 'Summary seven.'}
+
+
+def test_parse_batch_response_accepts_a_list_of_objects():
+    text = json.dumps([{'row_id': 1, 'summary': 'One.'}, {'row_id': '2', 'summary': 'Two.'}, 'junk'])
+    assert parse_batch_response(text, [1, 2]) == {1: 'One.', 2: 'Two.'}
+
+
+def test_parse_batch_response_drops_missing_and_malformed_rows():
+    text = json.dumps({'0': 'Good.', '1': '   ', '2': None, '3': ['a', 'b'], '9': 'Not requested.'})
+    assert parse_batch_response(text, [0, 1, 2, 3, 4]) == {0: 'Good.'}
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    None,
+    'Here are the reports: {"0": "cut off',
+    '```json\n{"0": "fenced"}\n```',
+    '"just a string"',
+    '42',
+    'null',
+])
+def test_parse_batch_response_malformed_replies(text):
+    assert parse_batch_response(text, [0]) == {}
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from hcta.cache import ResponseCache, cache_key, count_cached_summaries
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache('model-a', {'temperature': 0.2}, path=str(tmp_path / 'cache' / 'responses.sqlite3'))
+    yield cache
+    cache.close()
+
+
+def test_cache_key_covers_prompt_model_and_settings():
+    key = cache_key('prompt', 'model-a', {'temperature': 0.2})
+    assert key == cache_key('prompt', 'model-a', {'temperature': 0.2})
+    assert len(key) == 64
+    assert key != cache_key('prompt!', 'model-a', {'temperature': 0.2})
+    assert key != cache_key('prompt', 'model-b', {'temperature': 0.2})
+    assert key != cache_key('prompt', 'model-a', {'temperature': 0.3})
+    # Settings are order-independent.
+    assert cache_key('p', 'm', {'a': 1, 'b': 2}) == cache_key('p', 'm', {'b': 2, 'a': 1})
+
+
+def test_get_and_put(cache):
+    assert cache.get('prompt') is None
+    cache.put('prompt', 'summary')
+    assert cache.get('prompt') == 'summary'
+    cache.put('prompt', 'newer summary')
+    assert cache.get('prompt') == 'newer summary'
+    assert len(cache) == 1
+
+
+def test_entries_persist_and_are_scoped_to_the_model(cache, tmp_path):
+    cache.put('prompt', 'summary')
+    other = ResponseCache('model-b', {'temperature': 0.2}, path=cache.path)
+    same = ResponseCache('model-a', {'temperature': 0.2}, path=cache.path)
+    try:
+        assert other.get('prompt') is None
+        assert same.get('prompt') == 'summary'
+    finally:
+        other.close()
+        same.close()
+    assert count_cached_summaries(cache.path) == 1
+    assert count_cached_summaries(str(tmp_path / 'missing.sqlite3')) == 0
+
+
+def _age(cache, prompt, days):
+    cache._conn.execute(
+        "UPDATE responses SET created_at = ? WHERE key = ?", (time.time() - days * 86400, cache.key(prompt))
+    )
+    cache._conn.commit()
+
+
+def test_expired_entries_are_misses(cache):
+    cache.max_age_days = 30
+    cache.put('old', 'stale')
+    cache.put('new', 'fresh')
+    _age(cache, 'old', 31)
+    assert cache.get('old') is None
+    assert cache.get('new') == 'fresh'
+    assert len(cache) == 1
+
+
+def test_evict_drops_old_then_least_recently_used(cache):
+    cache.max_age_days = 30
+    cache.max_entries = 2
+    for i in range(4):
+        cache.put(f'p{i}', f's{i}')
+    for i in range(4):
+        cache._conn.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (1000.0 + i, cache.key(f'p{i}'))
+        )
+    cache._conn.commit()
+    _age(cache, 'p3', 40)
+    # p3 is the most recently used but too old; of the rest, p0 is the least recently used.
+    cache.evict()
+    assert len(cache) == 2
+    assert cache.get('p3') is None
+    assert cache.get('p0') is None
+    assert cache.get('p1') == 's1'
+    assert cache.get('p2') == 's2'
+
+
+def test_evict_without_limits_keeps_everything(cache):
+    cache.max_age_days = None
+    cache.max_entries = None
+    for i in range(3):
+        cache.put(f'p{i}', 's')
+    _age(cache, 'p0', 400)
+    cache.evict()
+    assert len(cache) == 3
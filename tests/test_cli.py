@@ -0,0 +1,119 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from hcta import cli
+from hcta.engine import GenerationEngine
+from hcta.pipeline import RunSettings, generate_file
+from hcta.ratelimit import AdaptiveRateLimiter
+from hcta.resilience import RetryPolicy
+from hcta.streaming import sheet_path
+
+SETTINGS = RunSettings(batch_size=1, chunk_size=3, output_format='csv', validate_output=False)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+        self.candidates = []
+
+
+def stub_engine(settings=None, cache_path=None):
+    # Echo the candidate's name back so every row's summary can be traced.
+    def generate(prompt):
+        name = next(line for line in prompt.splitlines() if line.startswith('# Name: '))
+        return Response(f'summary for {name[len("# Name: "):]}')
+
+    engine = GenerationEngine(generate, 2, AdaptiveRateLimiter(10 ** 6, 10 ** 9), RetryPolicy(timeout=None))
+    return engine, None
+
+
+@pytest.mark.parametrize('start, stop, parts, expected', [
+    (0, 10, 3, [(0, 3), (3, 6), (6, 10)]),
+    (5, 7, 4, [(5, 6), (6, 7)]),
+    (0, 4, 1, [(0, 4)]),
+    (0, 3, 0, [(0, 3)]),
+    (3, 3, 2, []),
+])
+def test_split_range(start, stop, parts, expected):
+    assert cli.split_range(start, stop, parts) == expected
+
+
+@pytest.fixture(params=['csv', 'xlsx', 'parquet'])
+def cohort(request, tmp_path):
+    frame = pd.DataFrame({
+        'Name': [f'Candidate {i}' for i in range(10)],
+        'Gender': ['F', 'M'] * 5,
+        'Overall Leadership': [float(i % 5 + 1) for i in range(10)],
+    })
+    path = tmp_path / f'cohort.{request.param}'
+    if request.param == 'csv':
+        frame.to_csv(path, index=False)
+    elif request.param == 'xlsx':
+        frame.to_excel(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+    return str(path), frame
+
+
+@pytest.mark.parametrize('output', ['merged.csv', 'merged.xlsx'])
+def test_shards_merge_back_in_order(cohort, tmp_path, output):
+    path, frame = cohort
+    # The last shard lies past the end of the data and leaves an empty part, as a shard of trailing
+    # blank rows would.
+    shards = cli.split_range(0, 10, 3) + [(10, 12)]
+    parts = []
+    for i, (start, stop) in enumerate(shards):
+        part = str(tmp_path / f'part-{i}.csv')
+        engine, _ = stub_engine()
+        generate_file(engine, path, path, SETTINGS, part, start=start, stop=stop)
+        engine.close()
+        parts.append(part)
+    with open(parts[-1], 'rb') as handle:
+        assert handle.read() == b''
+
+    output_path = str(tmp_path / output)
+    assert cli.merge_outputs(parts, output_path, chunksize=4) == 10
+    if output.endswith('.csv'):
+        merged = pd.read_csv(output_path)
+        metrics = pd.read_csv(sheet_path(output_path, 'Metrics'))
+    else:
+        merged = pd.read_excel(output_path, sheet_name='Results')
+        metrics = pd.read_excel(output_path, sheet_name='Metrics')
+    assert list(merged['Name']) == list(frame['Name'])
+    assert list(merged['Generated Summary']) == [f'summary for {name}' for name in frame['Name']]
+    assert list(metrics['Row']) == list(range(10))
+
+
+def test_merge_of_only_empty_parts(tmp_path):
+    part = tmp_path / 'part-0.csv'
+    part.write_bytes(b'')
+    assert cli.merge_outputs([str(part)], str(tmp_path / 'merged.csv')) == 0
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork', reason='the stubbed engine must be inherited by the workers',
+)
+def test_workers_shard_an_xlsx_with_blank_rows(tmp_path, monkeypatch):
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    path = str(tmp_path / 'padded.xlsx')
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Gender', 'Overall Leadership'])
+    for i in range(4):
+        sheet.append([f'Candidate {i}', 'M', 4])
+    # Formatted blank rows make the sheet report far more rows than it has.
+    for row in range(6, 40):
+        sheet.cell(row=row, column=1).font = Font(bold=True)
+    workbook.save(path)
+
+    monkeypatch.setattr(cli, 'configure_api', lambda api_key=None: 'key')
+    monkeypatch.setattr(cli, 'build_engine', stub_engine)
+    output = str(tmp_path / 'out.csv')
+    assert cli.main([path, '-o', output, '--workers', '4', '--no-validate', '--chunk-size', '2']) == 0
+    merged = pd.read_csv(output)
+    assert list(merged['Generated Summary']) == [f'summary for Candidate {i}' for i in range(4)]
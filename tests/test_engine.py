@@ -0,0 +1,206 @@
+import json
+import random
+import re
+import threading
+import time
+
+from hcta.engine import GenerationEngine
+from hcta.ratelimit import AdaptiveRateLimiter
+from hcta.resilience import RetryPolicy
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+        self.candidates = []
+
+
+def make_engine(generate_fn, max_concurrency=4, **kwargs):
+    kwargs.setdefault('retry_policy', RetryPolicy(base_delay=0.001, timeout=None))
+    return GenerationEngine(
+        generate_fn, max_concurrency, AdaptiveRateLimiter(10 ** 6, 10 ** 9), **kwargs
+    )
+
+
+def test_results_come_back_in_input_order():
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    def generate(prompt):
+        with lock:
+            delay = rng.uniform(0, 0.02)
+        time.sleep(delay)
+        return Response(prompt.upper())
+
+    engine = make_engine(generate, max_concurrency=8)
+    seen = []
+    results = engine.run([f'row {i}' for i in range(40)], on_result=lambda r: seen.append(r.index))
+    assert [r.index for r in results] == list(range(40))
+    assert [r.text for r in results] == [f'ROW {i}' for i in range(40)]
+    assert sorted(seen) == list(range(40))
+    assert engine.stats()['api_requests'] == 40
+
+
+def test_retryable_errors_are_retried():
+    calls = {}
+
+    def generate(prompt):
+        calls[prompt] = calls.get(prompt, 0) + 1
+        if calls[prompt] < 3:
+            raise ConnectionError('connection reset')
+        return Response('ok')
+
+    engine = make_engine(generate)
+    result, = engine.run(['a'])
+    assert result.ok and result.text == 'ok'
+    assert result.attempts == 3 and result.retries == 2
+    assert engine.stats()['retried_requests'] == 2
+
+
+def test_fatal_errors_fail_the_row_at_once():
+    def generate(prompt):
+        if prompt == 'bad':
+            raise ValueError('invalid argument')
+        return Response('ok')
+
+    results = make_engine(generate).run(['good', 'bad', 'good'])
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].attempts == 1
+    assert results[1].error_class == 'ValueError'
+    assert results[1].summary.startswith('Error generating summary:')
+
+
+def test_quota_errors_throttle_the_limiter():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError('429 quota exceeded')
+        return Response('ok')
+
+    engine = make_engine(generate, max_concurrency=1)
+    engine.limiter.cooldown = 0.01
+    result, = engine.run(['a'])
+    assert result.ok and result.retries == 1
+    assert engine.limiter.throttle_count == 1
+
+
+def test_retries_give_up_after_max_retries():
+    def generate(prompt):
+        raise TimeoutError('timed out')
+
+    engine = make_engine(generate, retry_policy=RetryPolicy(max_retries=2, base_delay=0.001, timeout=None))
+    result, = engine.run(['a'])
+    assert not result.ok
+    assert result.attempts == 3
+
+
+def answer_batch(prompt, skip=()):
+    ids = [int(i) for i in re.findall(r'ROW ID: (\d+)', prompt)]
+    return Response(json.dumps({str(i): f'summary {i}' for i in ids if i not in skip}))
+
+
+def test_batches_split_back_into_rows():
+    prompts = []
+
+    def generate(prompt):
+        prompts.append(prompt)
+        return answer_batch(prompt)
+
+    engine = make_engine(generate)
+    results = engine.run([f'row {i}' for i in range(7)], batch_size=3)
+    assert [r.text for r in results] == [f'summary {i}' for i in range(7)]
+    assert all(r.batched for r in results)
+    assert len(prompts) == 3
+    assert engine.stats()['api_requests'] == 3
+
+
+def test_rows_missing_from_a_batch_reply_are_requeued_alone():
+    singles = []
+
+    def generate(prompt):
+        if 'ROW ID' in prompt:
+            return answer_batch(prompt, skip={1, 4})
+        singles.append(prompt)
+        return Response(f'alone {prompt}')
+
+    results = make_engine(generate).run([f'row {i}' for i in range(6)], batch_size=3)
+    assert sorted(singles) == ['row 1', 'row 4']
+    assert [r.text for r in results] == [
+        'summary 0', 'alone row 1', 'summary 2', 'summary 3', 'alone row 4', 'summary 5',
+    ]
+    assert [r.batched for r in results] == [True, False, True, True, False, True]
+
+
+def test_unparseable_batch_reply_requeues_every_row():
+    def generate(prompt):
+        if 'ROW ID' in prompt:
+            return Response('Sorry, here are the reports in prose.')
+        return Response(f'alone {prompt}')
+
+    results = make_engine(generate).run(['a', 'b'], batch_size=2)
+    assert [r.text for r in results] == ['alone a', 'alone b']
+
+
+def test_batch_retries_are_counted_once():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise ConnectionError('connection reset')
+        return answer_batch(prompt)
+
+    engine = make_engine(generate, max_concurrency=1)
+    results = engine.run([f'row {i}' for i in range(5)], batch_size=5)
+    assert sum(r.retries for r in results) == 1
+    assert engine.stats()['retried_requests'] == 1
+
+
+GOOD = 'conforming summary'
+
+
+def validate(index, text):
+    return [] if text == GOOD else ['the summary is empty']
+
+
+def test_failing_rows_are_regenerated_with_a_correction():
+    prompts = []
+
+    def generate(prompt):
+        prompts.append(prompt)
+        return Response(GOOD if 'CORRECTION' in prompt or prompt == 'fine' else 'bad')
+
+    engine = make_engine(generate)
+    results = engine.run(['fine', 'needs fixing'], validate=validate, max_regenerations=2)
+    assert [r.text for r in results] == [GOOD, GOOD]
+    assert [r.regenerations for r in results] == [0, 1]
+    assert [r.issues for r in results] == [None, None]
+    # A regeneration is not a retry.
+    assert results[1].attempts == 2 and results[1].retries == 0
+    assert '# - the summary is empty' in prompts[-1]
+    assert engine.stats()['regenerated_rows'] == 1
+
+
+def test_rows_still_failing_are_flagged():
+    def generate(prompt):
+        return Response('bad')
+
+    result, = make_engine(generate).run(['a'], validate=validate, max_regenerations=2)
+    assert result.ok
+    assert result.regenerations == 2
+    assert result.issues == ['the summary is empty']
+
+
+def test_failing_batched_rows_are_regenerated_alone():
+    def generate(prompt):
+        if 'ROW ID' in prompt:
+            ids = re.findall(r'ROW ID: (\d+)', prompt)
+            return Response(json.dumps({i: GOOD if i != '1' else 'bad' for i in ids}))
+        return Response(GOOD)
+
+    results = make_engine(generate).run(['a', 'b', 'c'], batch_size=3, validate=validate, max_regenerations=1)
+    assert [r.text for r in results] == [GOOD] * 3
+    assert [r.regenerations for r in results] == [0, 1, 0]
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hcta.interpret import (
+    BEHAVIORAL_DICTIONARY,
+    build_interpreted_blocks,
+    categorize,
+    interpret_frame,
+)
+
+
+@pytest.mark.parametrize('score, level', [
+    (5, 'High'),
+    (3.5, 'High'),
+    (3.49, 'Moderate'),
+    (2.5, 'Moderate'),
+    (2.49, 'Low'),
+    (1, 'Low'),
+    ('4', 'High'),
+    (np.nan, None),
+    (None, None),
+    ('n/a', None),
+    ('', None),
+])
+def test_categorize_band_edges(score, level):
+    assert categorize(pd.Series([score])).iloc[0] == level
+
+
+def test_categorize_keeps_index():
+    levels = categorize(pd.Series([4, 'x', 2], index=[10, 11, 12]))
+    assert list(levels.index) == [10, 11, 12]
+    assert list(levels) == ['High', None, 'Low']
+
+
+@pytest.fixture
+def candidates():
+    return pd.DataFrame({
+        'Name': ['Ann', 'Bob'],
+        'Gender': ['F', 'M'],
+        'Overall Leadership': [4.5, 2],
+        'Reasoning & Problem Solving': [3, 'n/a'],
+        'Steers Changes': [4, 3],
+        'Change Potential': [5, 2],
+        'Drives Results': [2, 3.5],
+        'Empathy': [1.5, 3],
+    })
+
+
+def test_interpret_frame_levels_and_text(candidates):
+    interp = interpret_frame(candidates)
+    assert list(interp.index) == list(candidates.index)
+    assert list(interp['Overall Leadership Level']) == ['High', 'Low']
+    assert interp.loc[0, 'Overall Leadership Interpretation'] == BEHAVIORAL_DICTIONARY['Overall Leadership']['High']
+    assert interp.loc[1, 'Reasoning & Problem Solving Level'] is None
+    assert pd.isna(interp.loc[1, 'Reasoning & Problem Solving Interpretation'])
+    # Only competencies present in the frame get columns.
+    assert 'Develops Talent Level' not in interp.columns
+
+
+def test_interpret_frame_candidate_lists(candidates):
+    interp = interpret_frame(candidates)
+    # >= 4.0 are strengths and <= 2.0 development areas; Overall Leadership is never listed.
+    assert interp.loc[0, 'Strength Candidates'] == 'Steers Changes, Change Potential'
+    assert interp.loc[0, 'Development Candidates'] == 'Drives Results, Empathy'
+    assert interp.loc[1, 'Strength Candidates'] == ''
+    assert interp.loc[1, 'Development Candidates'] == 'Change Potential'
+
+
+def test_extra_columns_are_not_scores(candidates):
+    candidates['Employee ID'] = [10432, 1]
+    candidates['Age'] = [45, 2]
+    candidates['Generated Summary'] = ['', '']
+    interp = interpret_frame(candidates)
+    assert interp.loc[0, 'Strength Candidates'] == 'Steers Changes, Change Potential'
+    assert interp.loc[1, 'Development Candidates'] == 'Change Potential'
+
+
+def test_build_interpreted_blocks(candidates):
+    blocks = build_interpreted_blocks(candidates)
+    assert len(blocks) == 2
+    ann, bob = blocks
+    assert '# Name: Ann' in ann
+    assert '# Gender: F (pronouns: she/her)' in ann
+    assert f"# Overall Leadership: {BEHAVIORAL_DICTIONARY['Overall Leadership']['High']}" in ann
+    assert '# Steers Changes <-> Change Potential:' in ann
+    assert f"#   - Change Potential: {BEHAVIORAL_DICTIONARY['Change Potential']['High']}" in ann
+    # Pairs with neither side in the frame are left out.
+    assert 'Develops Talent' not in ann
+    assert '# STRENGTH CANDIDATES: Steers Changes, Change Potential' in ann
+    assert '# DEVELOPMENT CANDIDATES: Drives Results, Empathy' in ann
+
+    assert '# Gender: M (pronouns: he/his)' in bob
+    # A missing score leaves its interpretation out rather than printing NaN.
+    assert '# Reasoning & Problem Solving:' not in bob
+    assert 'nan' not in bob
+    assert '# STRENGTH CANDIDATES: None' in bob
+
+
+def test_build_interpreted_blocks_unknown_gender():
+    df = pd.DataFrame({'Name': ['Sam'], 'Gender': [None], 'Overall Leadership': [3]})
+    block, = build_interpreted_blocks(df)
+    assert '(pronouns: they/their)' in block
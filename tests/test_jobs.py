@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from hcta import jobs
+from hcta.engine import GenerationEngine, GenerationResult
+from hcta.gemini import TokenUsage
+from hcta.pipeline import RunSettings
+from hcta.ratelimit import AdaptiveRateLimiter
+from hcta.resilience import RetryPolicy
+
+SETTINGS = RunSettings(batch_size=1, chunk_size=2, output_format='csv', validate_output=False)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+        self.candidates = []
+
+
+class StubModel:
+    """Answers every prompt, except those naming a candidate in `failing`."""
+
+    def __init__(self):
+        self.failing = set()
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        for name in self.failing:
+            if f'Name: {name}\n' in prompt:
+                raise ValueError(f'blocked {name}')
+        return Response('summary')
+
+    def engine_factory(self, settings):
+        engine = GenerationEngine(
+            self.generate, 2, AdaptiveRateLimiter(10 ** 6, 10 ** 9), RetryPolicy(timeout=None),
+        )
+        return engine, None
+
+
+@pytest.fixture
+def model():
+    return StubModel()
+
+
+@pytest.fixture
+def manager(tmp_path, model):
+    return jobs.JobManager(root=str(tmp_path / 'jobs'), engine_factory=model.engine_factory)
+
+
+def candidates_csv(rows=5):
+    frame = pd.DataFrame({
+        'Name': [f'Candidate {i}' for i in range(rows)],
+        'Gender': ['F'] * rows,
+        'Overall Leadership': [3.0] * rows,
+    })
+    return frame.to_csv(index=False).encode('utf-8')
+
+
+def wait_for(manager, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while manager.is_alive(job_id) or manager.get(job_id)['status'] in jobs.ACTIVE_STATUSES:
+        assert time.monotonic() < deadline, 'job did not finish'
+        time.sleep(0.01)
+    return manager.get(job_id)
+
+
+def test_job_runs_to_completion(manager):
+    job_id = manager.submit(candidates_csv(), 'cohort.csv', SETTINGS)
+    job = wait_for(manager, job_id)
+    assert job['status'] == jobs.COMPLETED
+    # The exact row count is taken by the worker.
+    assert job['total_rows'] == 5
+    assert job['completed_rows'] == 5
+    results = pd.read_csv(job['output_path'])
+    assert list(results['Generated Summary']) == ['summary'] * 5
+    assert os.path.exists(job['output_path'].replace('.csv', '.metrics.csv'))
+
+
+def test_failed_rows_are_retried_on_resume(manager, model):
+    model.failing = {'Candidate 1', 'Candidate 3'}
+    job_id = manager.submit(candidates_csv(), 'cohort.csv', SETTINGS)
+    job = wait_for(manager, job_id)
+    assert job['status'] == jobs.COMPLETED
+    assert manager.store.failed_rows(job_id) == 2
+    assert manager.store.completed_row_indices(job_id) == {0, 2, 4}
+
+    model.failing = set()
+    model.prompts.clear()
+    manager.resume(job_id)
+    job = wait_for(manager, job_id)
+    # Only the two failed rows are sent again.
+    assert len(model.prompts) == 2
+    assert manager.store.failed_rows(job_id) == 0
+    totals = manager.store.totals(job_id)
+    assert totals['completed_rows'] == 5
+    assert totals['error_rows'] == 0
+    assert list(pd.read_csv(job['output_path'])['Generated Summary']) == ['summary'] * 5
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = jobs.JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create('job', 'cohort.csv', 'input.csv', SETTINGS, 3)
+    return store
+
+
+def test_record_row_replaces_an_earlier_attempt(store):
+    failed = GenerationResult(index=0, error=ValueError('x'), attempts=3, usage=TokenUsage(prompt=10, requests=1))
+    store.record_row('job', 0, 'Ann', failed)
+    totals = store.totals('job')
+    assert (totals['completed_rows'], totals['error_rows'], totals['retries'], totals['prompt_tokens']) == (1, 1, 2, 10)
+
+    retried = GenerationResult(index=0, text='ok', attempts=1, usage=TokenUsage(prompt=7, output=5, requests=1))
+    store.record_row('job', 0, 'Ann', retried)
+    store.record_row('job', 1, 'Bob', GenerationResult(index=1, text='hit', cached=True))
+    totals = store.totals('job')
+    assert totals['completed_rows'] == 2
+    assert totals['error_rows'] == 0
+    assert totals['retries'] == 0
+    assert totals['prompt_tokens'] == 7
+    assert totals['output_tokens'] == 5
+    assert totals['cached_rows'] == 1
+    assert totals['rows_since_start'] == 3
+
+
+def test_totals_are_backfilled_for_older_journals(store):
+    for i in range(3):
+        store.record_row('job', i, f'C{i}', GenerationResult(
+            index=i, text='ok', attempts=2 if i else 1, usage=TokenUsage(prompt=4, requests=1),
+        ))
+    expected = store.totals('job')
+    # Journals from before running totals existed have no job_totals row.
+    store._execute("DELETE FROM job_totals WHERE job_id = ?", ('job',))
+    backfilled = store.totals('job')
+    for field in jobs.TOTAL_FIELDS:
+        assert backfilled[field] == expected[field]
+    assert backfilled['retries'] == 2
+    assert backfilled['prompt_tokens'] == 12
+
+
+def test_older_journal_schema_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, input_name TEXT NOT NULL,"
+        " input_path TEXT NOT NULL, output_path TEXT, settings TEXT NOT NULL, stats TEXT NOT NULL DEFAULT '{}',"
+        " total_rows INTEGER, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL);"
+        "CREATE TABLE job_rows (job_id TEXT NOT NULL, row_index INTEGER NOT NULL, name TEXT,"
+        " summary TEXT NOT NULL, ok INTEGER NOT NULL, cached INTEGER NOT NULL, completed_at REAL NOT NULL,"
+        " PRIMARY KEY (job_id, row_index));"
+        "INSERT INTO jobs VALUES ('old', 'completed', 'in.csv', 'in.csv', NULL, '{}', '{}', 2, NULL, 1, 1);"
+        "INSERT INTO job_rows VALUES ('old', 0, 'Ann', 'text', 1, 0, 1), ('old', 1, 'Bob', 'err', 0, 0, 1);"
+    )
+    conn.commit()
+    conn.close()
+
+    store = jobs.JobStore(path)
+    columns = {row[1] for row in store._query("PRAGMA table_info(job_rows)")}
+    assert {'retries', 'queue_wait_s', 'issues', 'error_class'} <= columns
+    job = store.get('old')
+    assert job['started_at'] is None
+    assert job['completed_rows'] == 2
+    assert store.failed_rows('old') == 1
+    assert store.completed_row_indices('old') == {0}
+    assert store.summaries('old', [0, 1]) == {0: ('text', None), 1: ('err', None)}
+
+
+def test_expired_jobs_are_purged(tmp_path, model):
+    root = str(tmp_path / 'jobs')
+    manager = jobs.JobManager(root=root, engine_factory=model.engine_factory, retention_days=7)
+    old = manager.submit(candidates_csv(2), 'old.csv', SETTINGS)
+    recent = manager.submit(candidates_csv(2), 'recent.csv', SETTINGS)
+    wait_for(manager, old)
+    wait_for(manager, recent)
+    manager.store._execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 8 * 86400, old))
+
+    assert jobs.JobManager(root=root, engine_factory=model.engine_factory, retention_days=None).purge_expired() == 0
+    # A new manager (e.g. after a restart) purges on construction.
+    manager = jobs.JobManager(root=root, engine_factory=model.engine_factory, retention_days=7)
+    assert manager.get(old) is None
+    assert not os.path.exists(os.path.join(root, old))
+    assert not manager.store._query("SELECT 1 FROM job_rows WHERE job_id = ?", (old,))
+    assert manager.get(recent)['status'] == jobs.COMPLETED
+    assert os.path.exists(os.path.join(root, recent))
+
+
+def test_delete_leaves_running_jobs_alone(manager, model):
+    job_id = manager.submit(candidates_csv(2), 'cohort.csv', SETTINGS)
+    wait_for(manager, job_id)
+    # Pretend the worker is still running.
+    manager._threads[job_id] = type('Alive', (), {'is_alive': lambda self: True})()
+    assert not manager.delete(job_id)
+    assert manager.get(job_id) is not None
+    manager._threads.pop(job_id)
+    assert manager.delete(job_id)
+    assert manager.get(job_id) is None
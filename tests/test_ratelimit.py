@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from hcta.ratelimit import AdaptiveRateLimiter, TokenBucket
+
+
+def test_token_bucket_refill_and_wait():
+    bucket = TokenBucket(capacity=2, rate=1)
+    bucket.consume(2)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    bucket.refill(bucket.updated + 0.5)
+    assert bucket.level == pytest.approx(0.5)
+    bucket.refill(bucket.updated + 10)
+    assert bucket.level == 2
+
+
+def test_try_acquire_spends_the_burst_then_refuses():
+    limiter = AdaptiveRateLimiter(requests_per_minute=300)
+    # One second's worth of requests is available as a burst.
+    assert all(limiter.try_acquire() for _ in range(5))
+    assert not limiter.try_acquire()
+
+
+def test_tokens_per_minute_limits_large_prompts():
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, tokens_per_minute=600)
+    # The token bucket holds ten seconds of budget (100 tokens).
+    assert limiter.try_acquire(tokens=80)
+    assert not limiter.try_acquire(tokens=80)
+
+
+def test_throttle_halves_the_rate_and_pauses_callers():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, min_factor=0.2, cooldown=0.2)
+    limiter.on_throttle()
+    assert limiter.throttle_count == 1
+    assert limiter.factor == 0.5
+    assert limiter._requests.rate == pytest.approx(5.0)
+    # Callers are held back for the cooldown, even with burst room left before the throttle.
+    assert not limiter.try_acquire()
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.15
+
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.factor == 0.2
+    assert limiter.throttle_count == 3
+
+
+def test_retry_after_overrides_the_cooldown():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, cooldown=60)
+    limiter.on_throttle(retry_after=0.05)
+    time.sleep(0.1)
+    limiter._requests.level = 1.0
+    assert limiter.try_acquire()
+
+
+def test_success_recovers_to_the_configured_rate():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, recovery_step=0.2, cooldown=0)
+    limiter.on_throttle()
+    limiter.on_success()
+    assert limiter.factor == pytest.approx(0.7)
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.factor == 1.0
+    assert limiter._requests.rate == pytest.approx(10.0)
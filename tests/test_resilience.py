@@ -0,0 +1,203 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from hcta import pipeline
+from hcta.resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    RequestTimeout,
+    RetryPolicy,
+    call_with_deadline,
+    is_quota_error,
+    is_retryable_error,
+)
+
+
+@pytest.mark.parametrize('error', [
+    ConnectionError('reset by peer'),
+    TimeoutError(),
+    RequestTimeout('no response'),
+    api_exceptions.ResourceExhausted('quota'),
+    api_exceptions.TooManyRequests('slow down'),
+    api_exceptions.ServiceUnavailable('down'),
+    api_exceptions.InternalServerError('oops'),
+    api_exceptions.DeadlineExceeded('late'),
+    RuntimeError('503 Service Unavailable'),
+    RuntimeError('Request timed out'),
+])
+def test_retryable_errors(error):
+    assert is_retryable_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    api_exceptions.InvalidArgument('bad prompt'),
+    api_exceptions.PermissionDenied('no key'),
+    api_exceptions.NotFound('no model'),
+    # A status code in the message does not override the API's own 400.
+    api_exceptions.BadRequest('field 503 is invalid'),
+    ValueError('response blocked'),
+    KeyError('text'),
+])
+def test_fatal_errors(error):
+    assert not is_retryable_error(error)
+
+
+def test_quota_errors():
+    assert is_quota_error(api_exceptions.ResourceExhausted('x'))
+    assert is_quota_error(RuntimeError('429 Too Many Requests'))
+    assert is_quota_error(RuntimeError('Rate limit reached'))
+    assert not is_quota_error(api_exceptions.ServiceUnavailable('x'))
+
+
+def test_backoff_is_full_jitter_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    rng = random.Random(0)
+    for retry, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)):
+        delays = [policy.backoff(retry, rng) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= ceiling
+        assert max(delays) > ceiling * 0.8
+
+
+def test_latency_tracker_needs_min_samples():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile(95) is None
+    for value in range(1, 21):
+        tracker.add(value)
+    # Only the last 10 samples are kept.
+    assert tracker.percentile(50) == pytest.approx(15.5)
+    assert tracker.percentile(95, min_samples=11) is None
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.on_failure()
+    breaker.on_failure()
+    breaker.on_success()
+    breaker.on_failure()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.open_count == 1
+
+
+def test_breaker_blocks_until_reset_then_probes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    breaker.on_failure()
+    started = time.monotonic()
+    breaker.wait()
+    assert time.monotonic() - started >= 0.15
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # Other callers wait for the probe's outcome.
+    released = threading.Event()
+    waiter = threading.Thread(target=lambda: (breaker.wait(), released.set()))
+    waiter.start()
+    assert not released.wait(0.1)
+    breaker.on_success()
+    assert released.wait(1)
+    waiter.join()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.on_failure()
+    breaker.wait()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.open_count == 2
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def _sleeper(*delays):
+    # Each call sleeps for the next delay and returns its call number.
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            number = len(calls)
+            calls.append(number)
+        time.sleep(delays[number])
+        return number
+    return fn, calls
+
+
+def test_call_with_deadline_returns_the_result(executor):
+    fn, _ = _sleeper(0.01)
+    assert call_with_deadline(executor, fn, timeout=1) == (0, False)
+
+
+def test_call_with_deadline_times_out(executor):
+    fn, _ = _sleeper(0.5)
+    started = time.monotonic()
+    with pytest.raises(RequestTimeout):
+        call_with_deadline(executor, fn, timeout=0.05)
+    assert time.monotonic() - started < 0.3
+
+
+def test_call_with_deadline_raises_the_call_error(executor):
+    def fn():
+        raise api_exceptions.InvalidArgument('bad')
+
+    with pytest.raises(api_exceptions.InvalidArgument):
+        call_with_deadline(executor, fn, timeout=1)
+
+
+def test_hedge_wins_over_a_slow_call(executor):
+    fn, calls = _sleeper(0.5, 0.01)
+    started = time.monotonic()
+    assert call_with_deadline(executor, fn, timeout=2, hedge_after=0.05) == (1, True)
+    assert time.monotonic() - started < 0.3
+    assert len(calls) == 2
+
+
+def test_original_can_still_win_after_hedging(executor):
+    fn, _ = _sleeper(0.1, 0.5)
+    assert call_with_deadline(executor, fn, timeout=2, hedge_after=0.05) == (0, True)
+
+
+def test_refused_hedge_waits_for_the_original(executor):
+    fn, calls = _sleeper(0.15)
+    asked = []
+    result = call_with_deadline(
+        executor, fn, timeout=2, hedge_after=0.05, try_hedge=lambda: asked.append(1) or False,
+    )
+    assert result == (0, False)
+    assert asked == [1]
+    assert len(calls) == 1
+
+
+def test_build_engine_disables_the_sdk_retry(monkeypatch, tmp_path):
+    # The engine's RetryPolicy must be the only retry path (the SDK would retry 5xx/429 on its own).
+    calls = []
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr(pipeline, 'build_model', lambda *args, **kwargs: (Model(), None))
+    settings = pipeline.RunSettings(use_context_cache=False, request_timeout=30)
+    engine, _ = pipeline.build_engine(settings, cache_path=str(tmp_path / 'cache.sqlite3'))
+    try:
+        engine.generate_fn('prompt')
+        engine.batch_generate_fn('prompt')
+    finally:
+        engine.close()
+    for kwargs in calls:
+        assert 'retry' in kwargs['request_options']
+        assert kwargs['request_options']['retry'] is None
+        assert kwargs['request_options']['timeout'] == 30
+    assert calls[1]['generation_config'] == {'response_mime_type': 'application/json'}
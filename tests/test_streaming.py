@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from hcta.streaming import ResultWriter, count_rows, parse_row_range, read_chunks, sheet_path
+
+
+@pytest.fixture
+def padded_xlsx(tmp_path):
+    # Five data rows followed by formatted but empty rows, as spreadsheet exports often have.
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    path = tmp_path / 'padded.xlsx'
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Gender', 'Overall Leadership'])
+    for i in range(5):
+        sheet.append([f'Candidate {i}', 'F', 3])
+    for row in range(7, 20):
+        sheet.cell(row=row, column=1).font = Font(bold=True)
+    workbook.save(path)
+    return path
+
+
+def test_count_rows_xlsx_exact_and_estimate(padded_xlsx):
+    assert count_rows(str(padded_xlsx), 'padded.xlsx') == 5
+    # The estimate comes from the sheet dimensions, which include the formatted blank rows.
+    assert count_rows(str(padded_xlsx), 'padded.xlsx', exact=False) == 18
+
+
+def test_count_rows_csv(tmp_path):
+    path = tmp_path / 'in.csv'
+    pd.DataFrame({'Name': ['a', 'b', 'c']}).to_csv(path, index=False)
+    assert count_rows(str(path), 'in.csv') == 3
+    with open(path, 'rb') as handle:
+        assert count_rows(handle, 'in.csv') == 3
+        assert handle.tell() == 0
+
+
+@pytest.fixture(params=['csv', 'xlsx', 'parquet'])
+def candidate_file(request, tmp_path):
+    frame = pd.DataFrame({
+        'Name': [f'Candidate {i}' for i in range(11)],
+        'Gender': ['F', 'M'] * 5 + ['F'],
+        'Overall Leadership': [float(i % 5 + 1) for i in range(11)],
+    })
+    path = tmp_path / f'cohort.{request.param}'
+    if request.param == 'csv':
+        frame.to_csv(path, index=False)
+    elif request.param == 'xlsx':
+        frame.to_excel(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+    return str(path), frame
+
+
+def test_read_chunks_keeps_global_positions(candidate_file):
+    path, frame = candidate_file
+    chunks = list(read_chunks(path, path, chunksize=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 3]
+    combined = pd.concat(chunks)
+    assert list(combined.index) == list(range(11))
+    assert list(combined['Name']) == list(frame['Name'])
+
+
+@pytest.mark.parametrize('start, stop', [(0, 11), (0, 4), (3, 9), (4, 8), (10, 11), (5, None), (11, None), (20, 30)])
+def test_read_chunks_row_ranges(candidate_file, start, stop):
+    path, frame = candidate_file
+    chunks = list(read_chunks(path, path, chunksize=4, start=start, stop=stop))
+    expected = frame.iloc[start:stop]
+    if expected.empty:
+        assert chunks == []
+        return
+    combined = pd.concat(chunks)
+    assert list(combined.index) == list(range(start, start + len(expected)))
+    assert list(combined['Name']) == list(expected['Name'])
+    assert all(len(chunk) for chunk in chunks)
+
+
+def test_read_chunks_empty_csv(tmp_path):
+    path = tmp_path / 'empty.csv'
+    path.write_bytes(b'')
+    assert list(read_chunks(str(path), 'empty.csv')) == []
+    assert count_rows(str(path), 'empty.csv') == 0
+
+
+def test_read_chunks_skips_blank_xlsx_rows(padded_xlsx):
+    chunks = list(read_chunks(str(padded_xlsx), 'padded.xlsx', chunksize=2))
+    assert sum(len(chunk) for chunk in chunks) == 5
+
+
+@pytest.mark.parametrize('text, expected', [('0:10', (0, 10)), ('5:', (5, None)), (':7', (0, 7)), (' 2 : 2 ', (2, 2))])
+def test_parse_row_range(text, expected):
+    assert parse_row_range(text) == expected
+
+
+@pytest.mark.parametrize('text', ['5', '9:3', '-1:4', 'a:b'])
+def test_parse_row_range_rejects(text):
+    with pytest.raises(ValueError):
+        parse_row_range(text)
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'xlsx'])
+def test_result_writer_sheets(tmp_path, output_format):
+    path = str(tmp_path / f'out.{output_format}')
+    with ResultWriter(path, output_format) as writer:
+        writer.write_frame(pd.DataFrame({'a': [1, 2]}))
+        writer.write_frame(pd.DataFrame({'a': [3]}))
+        writer.write_frame(pd.DataFrame({'m': [0.5]}), 'Metrics')
+    assert writer.rows_written == 3
+    if output_format == 'csv':
+        assert pd.read_csv(path)['a'].tolist() == [1, 2, 3]
+        assert pd.read_csv(sheet_path(path, 'Metrics'))['m'].tolist() == [0.5]
+    else:
+        assert pd.read_excel(path, sheet_name='Results')['a'].tolist() == [1, 2, 3]
+        assert pd.read_excel(path, sheet_name='Metrics')['m'].tolist() == [0.5]
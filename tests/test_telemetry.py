@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+
+from hcta.engine import GenerationResult
+from hcta.gemini import TokenUsage
+from hcta.jobs import JobStore
+from hcta.pipeline import RunSettings
+from hcta.telemetry import prometheus_text, result_metrics, summarize
+
+
+def record(row, ok=True, cached=False, latency=0.0, **fields):
+    result = GenerationResult(
+        index=row, text='ok' if ok else None, error=None if ok else ValueError('x'), cached=cached,
+        latency=latency, attempts=fields.pop('attempts', 1), usage=fields.pop('usage', None), **fields,
+    )
+    return result_metrics(row, f'C{row}', result)
+
+
+def test_summarize_empty():
+    summary = summarize([], total_rows=5, elapsed=10)
+    assert summary['completed_rows'] == 0
+    assert summary['error_rate'] == 0.0
+    assert summary['rows_per_second'] is None
+    assert summary['eta_seconds'] is None
+    assert summary['api_latency_p50_s'] is None
+    assert summary['queue_wait_mean_s'] is None
+
+
+def test_summarize():
+    records = [
+        record(0, latency=1.0, queue_wait=0.5, attempts=3, usage=TokenUsage(prompt=10, cached=4, output=6)),
+        record(1, latency=3.0, queue_wait=1.5, usage=TokenUsage(prompt=10, output=2)),
+        record(2, ok=False, latency=2.0, queue_wait=1.0, attempts=2),
+        # Cached rows count as completed but not towards latency or queue wait.
+        record(3, cached=True, latency=50.0, queue_wait=9.0),
+    ]
+    summary = summarize(records, total_rows=10, elapsed=2.0)
+    assert summary['completed_rows'] == 4
+    assert summary['error_rows'] == 1
+    assert summary['error_rate'] == 0.25
+    assert summary['rows_per_second'] == 2.0
+    assert summary['eta_seconds'] == 3.0
+    assert summary['api_latency_p50_s'] == 2.0
+    assert summary['api_latency_p95_s'] == pytest.approx(2.9)
+    assert summary['queue_wait_mean_s'] == 1.0
+    assert summary['retries'] == 3
+    assert (summary['prompt_tokens'], summary['cached_tokens'], summary['output_tokens']) == (20, 4, 8)
+    # A DataFrame of records gives the same figures.
+    assert summarize(pd.DataFrame(records), total_rows=10, elapsed=2.0) == summary
+
+
+def test_summarize_without_total_rows_has_no_eta():
+    summary = summarize([record(0)], elapsed=1.0)
+    assert summary['rows_per_second'] == 1.0
+    assert summary['eta_seconds'] is None
+
+
+def test_prometheus_text():
+    summary = summarize([record(0, latency=1.0), record(1, ok=False, latency=2.0)])
+    text = prometheus_text(summary, {'api_requests': 3, 'throttled': 1}, labels={'job': 'a', 'input': 'x.csv'})
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert '# HELP hcta_rows_completed Rows with a summary or error recorded.' in lines
+    assert '# TYPE hcta_rows_completed gauge' in lines
+    # Labels are sorted so the output is stable.
+    assert 'hcta_rows_completed{input="x.csv",job="a"} 2' in lines
+    assert 'hcta_error_ratio{input="x.csv",job="a"} 0.5' in lines
+    assert '# TYPE hcta_api_requests_total counter' in lines
+    assert 'hcta_throttled_total{input="x.csv",job="a"} 1' in lines
+    assert 'hcta_hedged_requests_total{input="x.csv",job="a"} 0' in lines
+    # Metrics without a value (no elapsed time given) are left out.
+    assert 'hcta_rows_per_second' not in text
+    assert 'hcta_eta_seconds' not in text
+
+
+def test_prometheus_text_without_stats_or_labels():
+    text = prometheus_text(summarize([record(0)]))
+    assert 'hcta_rows_completed 1' in text.splitlines()
+    assert 'hcta_api_requests_total' not in text
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create('job', 'cohort.csv', 'input.csv', RunSettings(), 20)
+    return store
+
+
+def test_latency_percentile_is_nearest_rank(store):
+    assert store._latency_percentile('job', 0, 95) is None
+    # Latencies 0.1 .. 1.0 s, recorded out of order, plus cached rows that must be ignored.
+    for i, tenths in enumerate([7, 2, 10, 5, 1, 9, 4, 8, 3, 6]):
+        store.record_row('job', i, f'C{i}', GenerationResult(index=i, text='ok', latency=tenths / 10))
+    for i in range(10, 13):
+        store.record_row('job', i, f'C{i}', GenerationResult(index=i, text='ok', cached=True, latency=99.0))
+
+    def percentile(q):
+        return store._latency_percentile('job', 10, q)
+
+    assert percentile(0) == 0.1
+    assert percentile(50) == 0.5
+    assert percentile(90) == 0.9
+    assert percentile(95) == 1.0
+    assert percentile(100) == 1.0
+    summary = store.telemetry('job')
+    assert (summary['api_latency_p50_s'], summary['api_latency_p95_s']) == (0.5, 1.0)
+
+
+def test_latency_percentile_of_a_single_row(store):
+    store.record_row('job', 0, 'C0', GenerationResult(index=0, text='ok', latency=0.25))
+    assert store._latency_percentile('job', 1, 50) == 0.25
+    assert store._latency_percentile('job', 1, 95) == 0.25
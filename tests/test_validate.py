@@ -0,0 +1,148 @@
+import re
+
+import pytest
+
+from hcta.prompt import GOLD_STANDARD_EXAMPLES
+from hcta.validate import correction_note, format_issues, validate_summary
+
+ROW = {'Name': 'Alex Smith', 'Gender': 'M', 'Overall Leadership': 4}
+
+SUMMARY = """Alex Smith demonstrates high leadership potential, with a strong drive to deliver results. He builds trust quickly across 3 teams and uses 360-degree feedback well.
+
+Strengths:
+• Sets clear goals and follows through under pressure.
+• Builds strong relationships with stakeholders.
+
+Development Areas:
+• May benefit from coaching others more actively.
+• Has an opportunity to plan further ahead."""
+
+
+def gold_examples():
+    examples = []
+    for block in GOLD_STANDARD_EXAMPLES.split('# **EXAMPLE')[1:]:
+        inputs = dict(
+            item.split(': ', 1)
+            for item in re.search(r'\*\*INPUT:\*\* (.*)', block).group(1).split(', ')
+        )
+        output = block.split('**CORRECT OUTPUT:**\n', 1)[1].split('\n\n', 1)[0]
+        text = '\n'.join(line[2:] if line.startswith('# ') else line.lstrip('#') for line in output.splitlines())
+        examples.append((inputs, text))
+    return examples
+
+
+# These gold examples open with "moderate" although their Overall Leadership score falls in
+# another band; the prompt text is left as curated, so only that check fails for them.
+GOLD_OPENING_MISMATCHES = {'Jane Doe': 'low', 'Sub 5': 'high'}
+
+
+@pytest.mark.parametrize('row, text', gold_examples(), ids=lambda value: value.get('Name') if isinstance(value, dict) else '')
+def test_gold_examples_pass(row, text):
+    level = GOLD_OPENING_MISMATCHES.get(row['Name'])
+    expected = [f'the paragraph must open with the Overall Leadership sentence ({level} potential)'] if level else []
+    assert validate_summary(text, row) == expected
+
+
+def test_conforming_summary_passes():
+    assert validate_summary(SUMMARY, ROW) == []
+
+
+def test_numbered_bullets_are_accepted():
+    text = SUMMARY.replace('• Sets', '1. Sets').replace('• Builds', '2) Builds')
+    text = text.replace('• May', '1. May').replace('• Has', '2. Has')
+    assert validate_summary(text, ROW) == []
+
+
+@pytest.mark.parametrize('phrase', [
+    'worked with 3 teams',
+    'used 360-degree feedback',
+    'led 12 projects in 2023',
+    'grew revenue by 20%',
+])
+def test_counts_are_not_scores(phrase):
+    text = SUMMARY.replace('with a strong drive', f'and {phrase}, with a strong drive')
+    assert validate_summary(text, ROW) == []
+
+
+@pytest.mark.parametrize('phrase', [
+    'an average of 3.5',
+    'a 4/5 rating',
+    '4 out of 5',
+    'scored 4',
+    'a rating of 2',
+    'a high score (4)',
+])
+def test_scores_are_flagged(phrase):
+    text = SUMMARY.replace('with a strong drive', f'with {phrase} and a strong drive')
+    assert validate_summary(text, ROW) == ['the summary mentions numeric scores']
+
+
+def test_a_name_with_digits_is_not_a_score():
+    row = dict(ROW, Name='Sub 4.5')
+    assert validate_summary(SUMMARY.replace('Alex Smith', 'Sub 4.5'), row) == []
+
+
+@pytest.mark.parametrize('name, written', [
+    ('John A. Smith', 'John A. Smith'),
+    ('Dr. Alan Chen', 'Dr. Alan Chen'),
+    ('Mr. Li', 'Mr. Li'),
+    ('Li Wei', 'Mr. Li'),
+    ('J. R. Okafor', 'J. R. Okafor'),
+])
+def test_names_with_initials_and_titles(name, written):
+    text = SUMMARY.replace('Alex Smith', written)
+    assert validate_summary(text, dict(ROW, Name=name)) == []
+    wrong = text.replace('high leadership', 'low leadership')
+    assert validate_summary(wrong, dict(ROW, Name=name)) == [
+        'the paragraph must open with the Overall Leadership sentence (high potential)'
+    ]
+
+
+def test_opening_is_checked_in_the_first_sentence_only():
+    text = SUMMARY.replace(
+        'Alex Smith demonstrates high leadership potential, with',
+        'Alex Smith is a steady contributor. He demonstrates high leadership potential with',
+    )
+    assert validate_summary(text, ROW) == [
+        'the paragraph must open with the Overall Leadership sentence (high potential)'
+    ]
+
+
+def test_wrong_opening_band():
+    text = SUMMARY.replace('high leadership', 'moderate leadership')
+    assert validate_summary(text, ROW) == [
+        'the paragraph must open with the Overall Leadership sentence (high potential)'
+    ]
+    # Without a usable score the opening is not checked.
+    assert validate_summary(text, dict(ROW, **{'Overall Leadership': 'n/a'})) == []
+
+
+def test_pronoun_mismatch():
+    assert validate_summary(SUMMARY, dict(ROW, Gender='F')) == ['pronouns (he) do not match Gender F']
+    assert validate_summary(SUMMARY, dict(ROW, Gender='')) == []
+
+
+def test_structure_problems():
+    assert validate_summary('', ROW) == ['the summary is empty']
+    assert validate_summary(None, ROW) == ['the summary is empty']
+
+    one_bullet = SUMMARY.replace('• Builds strong relationships with stakeholders.\n', '')
+    assert validate_summary(one_bullet, ROW) == ['expected 2 "Strengths" bullets, found 1']
+
+    no_headings = SUMMARY.replace('Strengths:', 'Highlights:')
+    assert 'missing the "Strengths:" or "Development Areas:" heading' in validate_summary(no_headings, ROW)
+
+    paragraph, strengths, development = SUMMARY.split('\n\n')
+    swapped = '\n\n'.join([paragraph, development, strengths])
+    assert validate_summary(swapped, ROW) == ['"Strengths:" must come before "Development Areas:"']
+
+    long_paragraph = SUMMARY.replace('with a strong drive', 'with ' + 'very ' * 200 + 'strong drive')
+    issue, = validate_summary(long_paragraph, ROW)
+    assert issue.startswith('the paragraph has 2') and issue.endswith('words (must be under 200)')
+
+
+def test_correction_note_lists_the_issues():
+    note = correction_note(['first problem', 'second problem'])
+    assert '# - first problem\n# - second problem' in note
+    assert format_issues(['a', 'b']) == 'a; b'
+    assert format_issues([]) is None